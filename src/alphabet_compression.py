@@ -0,0 +1,71 @@
+import automata
+
+def get_symbol_width(aut: automata.Automaton) -> int:
+    symbols = aut.alphabet.get_symbol_map().keys()
+    return len(next(iter(symbols))) if len(symbols) > 0 else 0
+
+def get_transitions_with_symbols(aut: automata.Automaton) -> list:
+    # (src, symbol, dst) with symbols as binary strings
+    # alphabets are created by automata.create_symbol_map -> symbol string is the binary number
+    width = get_symbol_width(aut)
+    return [
+        (t.source, format(t.symbol, "0" + str(width) + "b"), t.target)
+        for t in aut.automaton.iterate()
+    ]
+
+def compute_symbol_classes(
+        restricted_initial_conf: automata.Automaton,
+        restricted_transducer: automata.Automaton,
+        accepting_transitions: automata.Automaton
+    ) -> list:
+    # symbols of the configurations that can occur in the system,
+    # symbols with the same behaviour in all automata form one class (minterm);
+    # a transducer transition relates a symbol to its partner on the other tape,
+    # symbols are distinguished by the class of the partner (not the partner itself)
+    # -> partition refinement starting from one class of all symbols
+    transitions = list()
+    for src, symbol, dst in get_transitions_with_symbols(restricted_initial_conf):
+        transitions.append((symbol, ("initial", src, dst), None))
+
+    # current and next configuration of the transducers
+    width = get_symbol_width(restricted_initial_conf)
+    for name, transducer in [("system", restricted_transducer), ("accepting", accepting_transitions)]:
+        if transducer == None or get_symbol_width(transducer) != 2 * width:
+            continue
+        for src, symbol, dst in get_transitions_with_symbols(transducer):
+            first = symbol[:int(len(symbol)/2)]
+            second = symbol[int(len(symbol)/2):]
+            transitions.append((first, (name, 0, src, dst), second))
+            transitions.append((second, (name, 1, src, dst), first))
+
+    symbols = sorted(set(symbol for symbol, _, _ in transitions))
+    class_of = {symbol: 0 for symbol in symbols}
+    number_of_classes = 1 if len(symbols) > 0 else 0
+    while True:
+        signatures = {symbol: set() for symbol in symbols}
+        for symbol, item, partner in transitions:
+            signatures[symbol].add(item + (class_of[partner] if partner != None else None,))
+
+        # split the classes by the signatures of their symbols
+        refined = dict()
+        for symbol in symbols:
+            key = (class_of[symbol], frozenset(signatures[symbol]))
+            if key not in refined:
+                refined[key] = len(refined)
+            class_of[symbol] = refined[key]
+        if len(refined) == number_of_classes:
+            break
+        number_of_classes = len(refined)
+
+    classes = [list() for _ in range(number_of_classes)]
+    for symbol in symbols:
+        classes[class_of[symbol]].append(symbol)
+    return sorted(classes)
+
+def get_pair_classes(symbol_classes: list) -> list:
+    # classes of the transducer symbols (current and next configuration)
+    pair_classes = list()
+    for first_class in symbol_classes:
+        for second_class in symbol_classes:
+            pair_classes.append([first + second for first in first_class for second in second_class])
+    return pair_classes
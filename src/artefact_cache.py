@@ -0,0 +1,115 @@
+import automata
+import serialization
+import hashlib
+import json
+import os
+
+# disk cache of automata computed before the search (e.g. the restricted system),
+# entries are files <key>.<name>.phaut in the binary format of serialization,
+# the least recently used entries are removed when the cache exceeds its size
+
+VERSION = "1"
+
+def get_key(automata_list: list, values = None) -> str:
+    # content hash of the input automata (including their symbol maps) and other inputs
+    digest = hashlib.sha256(VERSION.encode())
+    for aut in automata_list:
+        content = serialization.to_bytes(aut)
+        digest.update(len(content).to_bytes(8, "little"))
+        digest.update(content)
+    digest.update(json.dumps(values).encode())
+    return digest.hexdigest()
+
+class ArtefactCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def get_file_name(self, key: str, name: str) -> str:
+        return os.path.join(self.directory, key + "." + name + ".phaut")
+
+    def load(self, key: str, names: list):
+        # all artefacts of the key or None
+        file_names = [self.get_file_name(key, name) for name in names]
+        if not all(os.path.exists(file_name) for file_name in file_names):
+            return None
+        try:
+            artefacts = [serialization.load_automaton(file_name) for file_name in file_names]
+        except (OSError, ValueError):
+            return None
+        # mark as recently used
+        for file_name in file_names:
+            os.utime(file_name)
+        return artefacts
+
+    def store(self, key: str, names: list, artefacts: list):
+        for name, aut in zip(names, artefacts):
+            file_name = self.get_file_name(key, name)
+            # other processes never see a partially written file
+            temporary_file_name = file_name + "." + str(os.getpid()) + ".tmp"
+            serialization.save_automaton(aut, temporary_file_name)
+            os.replace(temporary_file_name, file_name)
+        self.evict(protected = key)
+
+    def evict(self, protected = None):
+        # remove the least recently used entries until the cache fits into max_bytes
+        entries = dict()
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".phaut"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            key = file_name.split(".")[0]
+            size, last_used, paths = entries.get(key, (0, 0.0, []))
+            entries[key] = (size + info.st_size, max(last_used, info.st_mtime), paths + [path])
+
+        total_size = sum(size for size, _, _ in entries.values())
+        for key, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total_size <= self.max_bytes:
+                break
+            if key == protected:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total_size -= size
+
+def get_restricted_system(
+        cache: ArtefactCache,
+        system_transducer: automata.Automaton,
+        initial_configurations: automata.Automaton,
+        local_constraints_transducer: automata.Automaton,
+        initial_automaton: automata.Automaton,
+        trace_quantifiers: list
+    ) -> tuple:
+    # restricted transducer and initial configurations (from the cache if possible)
+    names = ["restricted_transducer", "restricted_initial_conf"]
+    if cache != None:
+        key = get_key(
+            [system_transducer, initial_configurations, local_constraints_transducer, initial_automaton],
+            trace_quantifiers
+        )
+        artefacts = cache.load(key, names)
+        if artefacts != None:
+            return tuple(artefacts)
+
+    restricted_transducer = automata.restrict_transducer_with_formula(
+       system_transducer,
+       local_constraints_transducer,
+       trace_quantifiers
+    )
+    restricted_initial_conf = automata.restrict_automaton_with_formula(
+        initial_configurations,
+        initial_automaton,
+        trace_quantifiers,
+        restricted_transducer.symbol_map.copy()[-1]
+    )
+    if cache != None:
+        cache.store(key, names, [restricted_transducer, restricted_initial_conf])
+    return (restricted_transducer, restricted_initial_conf)
@@ -13,6 +13,33 @@ class Automaton:
         self.number_of_tapes = number_of_tapes
         self.atomic_propositions = atomic_propositions
 
+    def __getstate__(self):
+        # libmata objects cannot be pickled
+        # -> store states and transitions as plain lists (used by worker processes)
+        state = self.__dict__.copy()
+        symbols = list(self.alphabet.get_symbol_map().keys())
+        state["alphabet"] = len(symbols[0]) if len(symbols) > 0 else 0
+        state["automaton"] = (
+            self.automaton.num_of_states(),
+            list(self.automaton.initial_states),
+            list(self.automaton.final_states),
+            [(t.source, t.symbol, t.target) for t in self.automaton.iterate()],
+            self.automaton.label
+        )
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(create_symbol_map(state["alphabet"]))
+        mata_nfa.store()["alphabet"] = self.alphabet
+        num_states, initial_states, final_states, transitions, label = state["automaton"]
+        self.automaton = mata_nfa.Nfa(num_states)
+        self.automaton.make_initial_states(initial_states)
+        self.automaton.make_final_states(final_states)
+        for src, symbol, dst in transitions:
+            self.automaton.add_transition_object(mata_nfa.Transition(src, symbol, dst))
+        self.automaton.label = label
+
     def plot_automaton(self):
         plotting.plot(self.automaton, alphabet=self.alphabet)
 
@@ -113,8 +140,9 @@ def get_initial_configurations(input_file_name, symbol_map):
     # get FA from .mata
     alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(create_symbol_map(len(symbol_map)))
     mata_nfa.store()["alphabet"] = alphabet
-    automaton = parser.from_mata(
+    automaton = load_nfa_from_file(
         input_file_name, 
+        len(symbol_map),
         alphabet
     )
     automaton.label = "Symbols: " + str(symbol_map)
@@ -128,8 +156,9 @@ def get_automaton_with_configuration_tape(input_file_name, symbol_map):
     total_symbols = sum([len(map) for map in symbol_map])
     alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(create_symbol_map(total_symbols))
     mata_nfa.store()["alphabet"] = alphabet
-    automaton = parser.from_mata(
+    automaton = load_nfa_from_file(
         input_file_name, 
+        total_symbols,
         alphabet
     )
     automaton.label = "Symbols: " + str(symbol_map)
@@ -150,6 +179,75 @@ def intersection(aut1: Automaton, aut2: Automaton):
     create_label(aut, aut1.symbol_map)
     return aut
 
+def is_intersection_empty(automata: list) -> bool:
+    # emptiness of the intersection of all automata (over the same alphabet)
+    # product states are explored on demand, stops at the first accepting product state
+    successors = list()
+    for aut in automata:
+        aut_successors = dict()
+        for t in aut.automaton.iterate():
+            aut_successors.setdefault(t.source, dict()).setdefault(t.symbol, list()).append(t.target)
+        successors.append(aut_successors)
+    final_states = [set(aut.automaton.final_states) for aut in automata]
+
+    initial = list(itertools.product(*[aut.automaton.initial_states for aut in automata]))
+    visited = set(initial)
+    queue = list(initial)
+    for state in queue:
+        if all(state[i] in final_states[i] for i in range(len(automata))):
+            return False
+        # symbols enabled in all automata
+        symbols = set(successors[0].get(state[0], dict()).keys())
+        for i in range(1, len(automata)):
+            symbols &= set(successors[i].get(state[i], dict()).keys())
+        for symbol in symbols:
+            for next_state in itertools.product(*[successors[i][state[i]][symbol] for i in range(len(automata))]):
+                if next_state not in visited:
+                    visited.add(next_state)
+                    queue.append(next_state)
+
+    return True
+
+def find_shortest_counterexample(lhs: Automaton, rhs: Automaton):
+    # shortest word in L(lhs) but not in L(rhs) (over the same alphabet)
+    # BFS over states of lhs with subsets of states of rhs
+    # -> None if L(lhs) subseteq L(rhs), otherwise the word as a list of labels
+    lhs_successors = dict()
+    for t in lhs.automaton.iterate():
+        lhs_successors.setdefault(t.source, list()).append((t.symbol, t.target))
+    rhs_successors = dict()
+    for t in rhs.automaton.iterate():
+        rhs_successors.setdefault(t.source, dict()).setdefault(t.symbol, list()).append(t.target)
+    lhs_final_states = set(lhs.automaton.final_states)
+    rhs_final_states = set(rhs.automaton.final_states)
+
+    initial_subset = frozenset(rhs.automaton.initial_states)
+    initial = [(state, initial_subset) for state in lhs.automaton.initial_states]
+    predecessors = {state: None for state in initial}
+    queue = list(initial)
+    for state in queue:
+        lhs_state, subset = state
+        if lhs_state in lhs_final_states and len(subset & rhs_final_states) == 0:
+            labels = list()
+            while predecessors[state] != None:
+                state, label = predecessors[state]
+                labels.append(label)
+            return labels[::-1]
+        next_subsets = dict()
+        for symbol, target in lhs_successors.get(lhs_state, []):
+            if symbol not in next_subsets:
+                next_subsets[symbol] = frozenset(
+                    next_state 
+                    for rhs_state in subset 
+                    for next_state in rhs_successors.get(rhs_state, dict()).get(symbol, [])
+                )
+            next_state = (target, next_subsets[symbol])
+            if next_state not in predecessors:
+                predecessors[next_state] = (state, symbol)
+                queue.append(next_state)
+
+    return None
+
 def complement(aut: Automaton):
     mata_nfa.store()["alphabet"] = aut.alphabet
     result = mata_nfa.complement(aut.automaton, aut.alphabet)
@@ -162,6 +260,34 @@ def minimize(aut: Automaton):
     aut.automaton.trim()
     return aut.automaton 
 
+def get_canonical_form(aut: Automaton) -> tuple:
+    # minimal DFA with states numbered in BFS order (successors ordered by symbols)
+    # -> automata with the same language have the same canonical form
+    mata_nfa.store()["alphabet"] = aut.alphabet
+    dfa = mata_nfa.minimize(aut.automaton)
+    dfa.trim()
+    if len(dfa.initial_states) == 0:
+        # empty language
+        return tuple()
+
+    successors = dict()
+    for t in dfa.iterate():
+        successors.setdefault(t.source, list()).append((t.symbol, t.target))
+
+    initial_state = list(dfa.initial_states)[0]
+    numbering = {initial_state: 0}
+    queue = [initial_state]
+    transitions = list()
+    for state in queue:
+        for symbol, target in sorted(successors.get(state, [])):
+            if target not in numbering:
+                numbering[target] = len(numbering)
+                queue.append(target)
+            transitions.append((numbering[state], symbol, numbering[target]))
+    final_states = sorted(numbering[state] for state in dfa.final_states if state in numbering)
+
+    return (len(numbering), tuple(final_states), tuple(transitions))
+
 def determinize(aut: Automaton):
     mata_nfa.store()["alphabet"] = aut.alphabet
     result = mata_nfa.determinize(aut.automaton)
@@ -410,10 +536,62 @@ def restrict_automaton_with_formula(
 
     return initial_with_conf 
 
-def parse_transducer_from_file(filename, symbol_map, with_configuration=False) -> Transducer:
+def load_nfa_from_file(filename, width: int, alphabet, separator=False) -> mata_nfa.Nfa:
+    # stream lines of a .mata file (@NFA-explicit) directly into the automaton,
+    # states are numbered in the order of %States-enum (or of their first occurrence),
+    # symbols are binary strings of the given width -> numbers of create_symbol_map,
+    # other symbols are added to the on-the-fly alphabet (as by the parser of libmata)
+    automaton = mata_nfa.Nfa()
+    state_ids = dict()
+    def get_state(name):
+        state = state_ids.get(name)
+        if state == None:
+            state = len(state_ids)
+            state_ids[name] = state
+        return state
+
+    add_transition = automaton.add_transition
     with open(filename) as f:
-        input = f.read().splitlines()
+        for line_number, line in enumerate(f, start=1):
+            # check first line
+            if line.startswith("@"):
+                continue
+            parts = line.split()
+            if len(parts) == 0:
+                continue
+            # get states
+            if parts[0] == "%States-enum":
+                for state in parts[1:]:
+                    get_state(state)
+            # get initial states
+            elif parts[0] == "%Initial":
+                automaton.make_initial_states([get_state(state) for state in parts[1:]])
+            # get final states
+            elif parts[0] == "%Final":
+                automaton.make_final_states([get_state(state) for state in parts[1:]])
+            elif parts[0].startswith("%"):
+                continue
+            # transitions
+            else:
+                if len(parts) != 3:
+                    raise SyntaxError("Wrong input format on line " + str(line_number) + " of " + filename)
+                symbol = parts[1]
+                if separator:
+                    # current and next configuration are separated by one character (#)
+                    half = int(len(symbol) / 2)
+                    symbol = symbol[:half] + symbol[half+1:]
+                if len(symbol) == width and symbol.strip("01") == "":
+                    code = int(symbol, 2)
+                else:
+                    code = alphabet.translate_symbol(symbol)
+                add_transition(get_state(parts[0]), code, get_state(parts[2]))
+
+    # enumerated states without transitions
+    while automaton.num_of_states() < len(state_ids):
+        automaton.add_new_state()
+    return automaton
 
+def parse_transducer_from_file(filename, symbol_map, with_configuration=False) -> Transducer:
     if not with_configuration:
         number_of_tapes = 2
         new_symbol_map = [copy.deepcopy(symbol_map) for _ in range(2)]
@@ -427,40 +605,14 @@ def parse_transducer_from_file(filename, symbol_map, with_configuration=False) -
     alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(new_alphabet)
     mata_nfa.store()["alphabet"] = alphabet
 
-    states = []
-    initial_states = []
-    final_states = []
-    transitions = []
-    for line in input:
-        # check first line
-        if line.startswith("@NFA-explicit"):
-            continue
-        # get states
-        elif line.startswith("%States-enum"):
-            states = line.split()[1:]
-        # get initial states
-        elif line.startswith("%Initial"):
-            initial_states = line.split()[1:]
-        # get final states
-        elif line.startswith("%Final"):
-            final_states = line.split()[1:]
-        # transitions
-        else:
-            transitions.append(line.split())
-
     # create automaton
-    automaton = mata_nfa.Nfa(len(states), label="Symbols: " + str(new_symbol_map))
-    for state in initial_states:
-        automaton.make_initial_state(states.index(state))
-    for state in final_states:
-        automaton.make_final_state(states.index(state))
-    for t in transitions:
-        if len(t) != 3:
-            raise SyntaxError("Wrong input format")
-        src = states.index(t[0])
-        dst = states.index(t[2])
-        symbol = t[1][:int(len(t[1])/2)] + t[1][(int(len(t[1])/2))+1:]
-        automaton.add_transition(src, symbol, dst)
+    automaton = load_nfa_from_file(
+        filename,
+        len(next(iter(new_alphabet))),
+        alphabet,
+        separator = True
+    )
+    automaton.label = "Symbols: " + str(new_symbol_map)
 
     return Transducer(automaton, alphabet, new_symbol_map, number_of_tapes, symbol_map)
 
@@ -635,9 +787,9 @@ def extend_transducer_alphabet_on_configuration_tapes(automaton: Automaton, symb
 
     return Automaton(new_aut, alphabet, new_symbol_map, automaton.number_of_tapes, automaton.atomic_propositions)
 
-def remove_configuration_tape(aut: Automaton):
-    # create new automaton
-    new_symbol_map = aut.symbol_map.copy()[:-1]
+def remove_configuration_tape(aut: Automaton, count = 1):
+    # create new automaton (without the last count tapes)
+    new_symbol_map = aut.symbol_map.copy()[:-count]
     number_of_symbols = sum(len(map) for map in new_symbol_map)
     new_alphabet = create_symbol_map(number_of_symbols)
     alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(new_alphabet)
@@ -660,7 +812,7 @@ def remove_configuration_tape(aut: Automaton):
         new_aut,
         alphabet,
         new_symbol_map,
-        aut.number_of_tapes - 1,
+        aut.number_of_tapes - count,
         aut.atomic_propositions
     )
     result.automaton = minimize(result)
@@ -0,0 +1,259 @@
+#!/usr/bin/python3
+
+import parse
+import check
+import sat_solver
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shlex
+import signal
+import time
+
+# batch mode: many jobs (formula, invariant, relation, bounds) against one system,
+# the symbol mapping, initial configurations, system transducer and the grammar are loaded once
+# and inherited by the forked workers of the pool
+
+# manifest = JSON lines, e.g.
+#   {"name": "f01", "formula": "f01.txt", "max_states": 2, "invariant": "f01_inv.txt", "relation": "f01_rel.txt",
+#    "relation_bound": 2, "arguments": "--compress_alphabet --bounded_check 3"}
+# (paths are relative to the directory of the manifest, only formula and max_states are required)
+JOB_FILES = ["formula", "invariant", "relation"]
+
+# artefacts shared by the workers (set before the pool is created)
+SHARED = dict()
+
+class JobTimeout(Exception):
+    pass
+
+def read_manifest(file_name: str) -> list:
+    directory = os.path.dirname(os.path.abspath(file_name))
+    jobs = list()
+    with open(file_name) as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip() == "" or line.lstrip().startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SyntaxError("Wrong job on line " + str(line_number) + " of the manifest: " + str(e))
+            for name in ["formula", "max_states"]:
+                if name not in job:
+                    raise SyntaxError("Missing " + name + " of the job on line " + str(line_number) + " of the manifest")
+            for name in JOB_FILES:
+                if job.get(name) != None:
+                    job[name] = os.path.join(directory, job[name])
+            if "name" not in job:
+                job["name"] = "job" + str(len(jobs) + 1)
+            jobs.append(job)
+    return jobs
+
+def get_job_arguments(job: dict, shared_files: dict, search_arguments: list) -> dict:
+    arguments = [
+        "--formula", job["formula"],
+        "--initial_config", shared_files["initial_config"],
+        "--system_transducer", shared_files["system_transducer"],
+        "--symbol_mapping", shared_files["symbol_mapping"],
+        "--max_states", str(job["max_states"])
+    ]
+    for name in ["invariant", "relation", "relation_bound"]:
+        if job.get(name) != None:
+            arguments += ["--" + name, str(job[name])]
+    # arguments of the job come after the common ones -> they take precedence
+    args = parse.parse_command_line_arguments(
+        arguments + search_arguments + shlex.split(job.get("arguments", ""))
+    )
+    if args["pipeline"] > 0 or args["portfolio"] != None:
+        # workers of the pool cannot start their own processes
+        raise ValueError("--pipeline and --portfolio are not supported in the batch mode")
+    # options of check.py that are applied outside of the stages of a job
+    unsupported = [
+        option for option, given in [
+            ("--trace", args["trace"] != None),
+            ("--op_stats", args["op_stats"] != None),
+            ("--checkpoint", args["checkpoint"] != None),
+            ("--time_budget", len(args["time_budget"]) > 0),
+            ("--memory_budget", len(args["memory_budget"]) > 0)
+        ] if given
+    ]
+    if len(unsupported) > 0:
+        raise ValueError(", ".join(unsupported) + " cannot be used in the batch mode")
+    return args
+
+def run_stage(result: dict, name: str, function, *arguments):
+    start = time.perf_counter()
+    value = function(*arguments)
+    result["stages"][name] = time.perf_counter() - start
+    return value
+
+def raise_timeout(signal_number, frame):
+    raise JobTimeout()
+
+def run_job(job: dict) -> dict:
+    # runs in a worker of the pool
+    result = dict(name=job["name"], job=job, status="error", stages=dict())
+    start = time.perf_counter()
+    if SHARED["timeout"] > 0:
+        # the alarm is checked between calls of the automata library and the SAT solver
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, SHARED["timeout"])
+    try:
+        args = get_job_arguments(job, SHARED["files"], SHARED["search_arguments"])
+        # outputs of the stages are not printed
+        with contextlib.redirect_stdout(io.StringIO()):
+            system = run_stage(result, "load_formula", check.load_system, args, SHARED["grammar_parser"], SHARED["system"])
+            run_stage(result, "restrict_system", check.restrict_system, args, system)
+            relation, invariant = run_stage(result, "load_candidates", check.load_candidates, args, system)
+            A, T, _ = run_stage(
+                result,
+                "search",
+                check.search,
+                args,
+                check.get_search_arguments(args, system, relation, invariant),
+                False
+            )
+        result["status"] = "solved" if (A, T) != (None, None) else "not_solved"
+        if (A, T) != (None, None) and SHARED["solutions"] != None:
+            A.save_automaton(name=os.path.join(SHARED["solutions"], job["name"] + "_A"))
+            T.save_automaton(name=os.path.join(SHARED["solutions"], job["name"] + "_T"))
+    except JobTimeout:
+        result["status"] = "timeout"
+    except sat_solver.CandidateRejected as e:
+        # given invariant or relation does not satisfy a condition
+        result["status"] = "rejected"
+        result["failed_check"] = e.failed_check
+        result["reason"] = e.reason
+    except (Exception, SystemExit) as e:
+        # SystemExit from wrong arguments of the job
+        result["error"] = type(e).__name__ + ": " + str(e)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    result["time"] = time.perf_counter() - start
+    return result
+
+def run_batch(
+        files: dict,
+        jobs: list,
+        search_arguments: list,
+        workers: int,
+        timeout: float,
+        output: str,
+        solutions = None
+    ) -> dict:
+    start = time.perf_counter()
+    SHARED["grammar_parser"] = parse.create_parser("grammar.txt")
+    # files have the names of the arguments of check.py
+    SHARED["system"] = check.load_shared_system(files)
+    SHARED["files"] = files
+    SHARED["search_arguments"] = search_arguments
+    SHARED["timeout"] = timeout
+    SHARED["solutions"] = solutions
+    if solutions != None:
+        os.makedirs(solutions, exist_ok=True)
+    report = dict(
+        files = files,
+        search_arguments = search_arguments,
+        workers = workers,
+        shared_load_time = time.perf_counter() - start,
+        jobs = list()
+    )
+
+    context = multiprocessing.get_context("fork")
+    # one job per worker at a time (jobs differ a lot in their run time)
+    with context.Pool(workers) as pool:
+        for result in pool.imap_unordered(run_job, jobs, chunksize=1):
+            report["jobs"].append(result)
+            print(
+                result["name"],
+                result["status"],
+                "{:.3f}s".format(result["time"]),
+                result.get("error", result.get("reason", "")),
+                flush=True
+            )
+            # results of finished jobs are kept if the batch is interrupted
+            report["time"] = time.perf_counter() - start
+            with open(output, "w") as f:
+                json.dump(report, f, indent=4)
+    # order of the manifest
+    order = {job["name"]: index for index, job in enumerate(jobs)}
+    report["jobs"].sort(key=lambda result: order[result["name"]])
+    report["time"] = time.perf_counter() - start
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    return report
+
+if __name__ == "__main__":
+    input_parser = argparse.ArgumentParser(description="check many formulas against one system")
+    input_parser.add_argument(
+        "--manifest",
+        help="JSON lines file with the jobs (formula, max_states and optional invariant, relation, relation_bound, arguments, name)",
+        required=True
+    )
+    input_parser.add_argument(
+        "--initial_config",
+        help="path to the .mata file with FA representing initial configurations of the system",
+        required=True
+    )
+    input_parser.add_argument(
+        "--system_transducer",
+        help="path to the file with transducer representing transitition between system configurations",
+        required=True
+    )
+    input_parser.add_argument(
+        "--symbol_mapping",
+        help="path to the file with list of symbols",
+        required=True
+    )
+    input_parser.add_argument(
+        "--search_arguments",
+        help="other arguments of check.py used by all jobs (e.g. \"--compress_alphabet --bounded_check 3\")",
+        default="",
+        required=False
+    )
+    input_parser.add_argument(
+        "--workers",
+        help="number of worker processes (number of CPUs by default)",
+        type=int,
+        default=os.cpu_count(),
+        required=False
+    )
+    input_parser.add_argument(
+        "--timeout",
+        help="time limit of one job in seconds (0 = no limit)",
+        type=float,
+        default=0,
+        required=False
+    )
+    input_parser.add_argument(
+        "--output",
+        help="JSON file with the results",
+        default="batch.json",
+        required=False
+    )
+    input_parser.add_argument(
+        "--solutions",
+        help="optional directory where A and T of the solved jobs are saved",
+        required=False
+    )
+    args = vars(input_parser.parse_args())
+
+    jobs = read_manifest(args["manifest"])
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        input_parser.error("names of the jobs in the manifest are not unique")
+    run_batch(
+        dict(
+            initial_config = args["initial_config"],
+            system_transducer = args["system_transducer"],
+            symbol_mapping = args["symbol_mapping"]
+        ),
+        jobs,
+        shlex.split(args["search_arguments"]),
+        args["workers"],
+        args["timeout"],
+        args["output"],
+        args["solutions"]
+    )
@@ -0,0 +1,320 @@
+#!/usr/bin/python3
+
+import parse
+import check
+import automata
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import shlex
+import signal
+import tempfile
+import time
+
+# scaling benchmarks on generated families of token passing systems
+# the token moves at most (system_states - 2) processes to the right in one step,
+# other atomic propositions are copied unchanged
+
+# seconds for an instance to save its results after the timeout
+TIMEOUT_GRACE = 10
+
+def get_atomic_propositions(propositions: int) -> list:
+    # a1 is the token
+    return ["a" + str(i) for i in range(1, propositions + 1)]
+
+def get_symbols(first: str, propositions: int) -> list:
+    # symbols with the given first bit (other atomic propositions are arbitrary)
+    return [first + "".join(rest) for rest in itertools.product("01", repeat=propositions-1)]
+
+def generate_symbol_mapping(propositions: int) -> str:
+    return "\n".join(get_atomic_propositions(propositions)) + "\n"
+
+def generate_initial_configurations(propositions: int) -> str:
+    # only the leftmost process has the token
+    lines = ["@NFA-explicit", "%States-enum p q", "%Alphabet-auto", "%Initial p", "%Final q"]
+    lines += ["p " + symbol + " q" for symbol in get_symbols("1", propositions)]
+    lines += ["q " + symbol + " q" for symbol in get_symbols("0", propositions)]
+    return "\n".join(lines) + "\n"
+
+def generate_system_transducer(propositions: int, states: int) -> str:
+    if states < 3:
+        raise ValueError("The system transducer needs at least 3 states")
+    # p -> token is taken -> c1 ... c(states-2) -> token is placed -> f
+    moving = ["c" + str(i) for i in range(1, states - 1)]
+    lines = [
+        "@NFA-explicit",
+        "%States-enum " + " ".join(["p"] + moving + ["f"]),
+        "%Initial p",
+        "%Final p f"
+    ]
+    def copy(source, first, second, target):
+        for symbol in get_symbols("0", propositions):
+            lines.append(source + " " + first + symbol[1:] + "#" + second + symbol[1:] + " " + target)
+    for state in ["p", "f"]:
+        copy(state, "0", "0", state)
+        copy(state, "1", "1", state)
+    copy("p", "1", "0", moving[0])
+    for index, state in enumerate(moving):
+        copy(state, "0", "1", "f")
+        if index + 1 < len(moving):
+            copy(state, "0", "0", moving[index + 1])
+    return "\n".join(lines) + "\n"
+
+def generate_formula(trace_quantifiers: int, depth: int) -> str:
+    # alternating trace quantifiers (forall first) and a local property nested in depth temporal operators:
+    # G(p), p W (G(p)), F(p W (G(p))), p W (F(p W (G(p)))), ...
+    # (nesting is on the right side of W and inside F, other nestings are not supported by the formula conversion)
+    if trace_quantifiers < 1 or depth < 1:
+        raise ValueError("The formula needs at least 1 trace quantifier and 1 temporal operator")
+    traces = ["t" + str(i) for i in range(1, trace_quantifiers + 1)]
+    if trace_quantifiers == 1:
+        quantifiers = ["exists t1."]
+    else:
+        quantifiers = [("forall " if index % 2 == 0 else "exists ") + trace + "." for index, trace in enumerate(traces)]
+    atom = "(exists i. (" + " & ".join("a1_" + trace + "[i]" for trace in traces) + "))"
+    body = "G(" + atom + ")"
+    for level in range(1, depth):
+        if level % 2 == 1:
+            body = atom + " W (" + body + ")"
+        else:
+            body = "F(" + body + ")"
+    return " ".join(quantifiers) + " " + body + "\n"
+
+def write_instance(directory: str, parameters: dict) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    files = dict(
+        symbol_mapping = os.path.join(directory, "mapping.txt"),
+        initial_config = os.path.join(directory, "initial_conf.mata"),
+        system_transducer = os.path.join(directory, "system.txt"),
+        formula = os.path.join(directory, "formula.txt")
+    )
+    contents = dict(
+        symbol_mapping = generate_symbol_mapping(parameters["propositions"]),
+        initial_config = generate_initial_configurations(parameters["propositions"]),
+        system_transducer = generate_system_transducer(parameters["propositions"], parameters["system_states"]),
+        formula = generate_formula(parameters["trace_quantifiers"], parameters["depth"])
+    )
+    for name, file_name in files.items():
+        with open(file_name, "w") as f:
+            f.write(contents[name])
+    return files
+
+def get_automaton_size(aut: automata.Automaton) -> dict:
+    return {
+        "states": aut.automaton.num_of_states(),
+        "transitions": aut.automaton.get_num_of_transitions()
+    }
+
+def get_peak_rss() -> int:
+    # in kB (Linux), the instance and the processes started by the search (--pipeline, --portfolio),
+    # the instance runs in a spawned process: the high-water mark of its own address space (VmHWM)
+    # starts at the exec, ru_maxrss of RUSAGE_SELF would also contain the memory of the benchmark
+    peak = 0
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                peak = int(line.split()[1])
+    return max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+def save_result(result: dict, file_name: str):
+    result["time"] = sum(stage["time"] for stage in result["stages"].values())
+    result["peak_rss_kb"] = get_peak_rss()
+    # the file is replaced at once -> the benchmark never reads a partially written result
+    with open(file_name + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(file_name + ".tmp", file_name)
+
+def run_stage(result: dict, result_file: str, name: str, function, *arguments):
+    # time and peak memory after the stage (the peak is not reset between stages),
+    # finished stages are saved -> they are kept if the instance times out
+    start = time.perf_counter()
+    value = function(*arguments)
+    result["stages"][name] = {
+        "time": time.perf_counter() - start,
+        "peak_rss_kb": get_peak_rss()
+    }
+    save_result(result, result_file)
+    return value
+
+class InstanceTimeout(Exception):
+    pass
+
+def raise_timeout(signal_number, frame):
+    raise InstanceTimeout()
+
+def run_instance(parameters: dict, directory: str, search_arguments: list) -> dict:
+    # runs in a separate process -> peak memory of one instance,
+    # own process group -> processes started by the search are killed with it
+    os.setpgid(0, 0)
+    # SIGTERM after the timeout -> the search is stopped and its statistics are saved
+    signal.signal(signal.SIGTERM, raise_timeout)
+    files = write_instance(directory, parameters)
+    statistics_file = os.path.join(directory, "check_stats.json")
+    result_file = os.path.join(directory, "result.json")
+    args = parse.parse_command_line_arguments(
+        [
+            "--formula", files["formula"],
+            "--initial_config", files["initial_config"],
+            "--system_transducer", files["system_transducer"],
+            "--symbol_mapping", files["symbol_mapping"],
+            "--max_states", str(parameters["max_states"]),
+            "--check_stats", statistics_file
+        ] + search_arguments
+    )
+    result = dict(parameters=parameters, status="error", stages=dict(), sizes=dict())
+    try:
+        # outputs of the stages are not printed
+        with contextlib.redirect_stdout(io.StringIO()):
+            grammar_parser = parse.create_parser("grammar.txt")
+            system = run_stage(result, result_file, "load_system", check.load_system, args, grammar_parser)
+            run_stage(result, result_file, "restrict_system", check.restrict_system, args, system)
+            for name in ["system_transducer", "restricted_transducer", "restricted_initial_conf"]:
+                result["sizes"][name] = get_automaton_size(system[name])
+            result["sizes"]["accepting_transitions"] = get_automaton_size(system["formula"].mso_eventuality_constraints_transducer)
+            save_result(result, result_file)
+            A, T, _ = run_stage(
+                result,
+                result_file,
+                "search",
+                check.search,
+                args,
+                check.get_search_arguments(args, system, None, None),
+                False
+            )
+        result["status"] = "solved" if (A, T) != (None, None) else "not_solved"
+        if (A, T) != (None, None):
+            result["sizes"]["A"] = get_automaton_size(A)
+            result["sizes"]["T"] = get_automaton_size(T)
+    except InstanceTimeout:
+        # statistics of the search are written when it is stopped
+        result["status"] = "timeout"
+    except Exception as e:
+        result["error"] = type(e).__name__ + ": " + str(e)
+    if os.path.exists(statistics_file):
+        with open(statistics_file) as f:
+            result["statistics"] = json.load(f)
+    save_result(result, result_file)
+    return result
+
+def run_benchmark(parameter_grid: list, search_arguments: list, timeout: float, output: str) -> list:
+    results = list()
+    # a forked process would start with the memory of the benchmark (peak memory of the instance)
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for index, parameters in enumerate(parameter_grid):
+            instance_directory = os.path.join(directory, str(index))
+            result_file = os.path.join(instance_directory, "result.json")
+            # fresh process for every instance (peak memory, libmata state),
+            # not a pool worker -> the search can start its own processes (--pipeline, --portfolio)
+            process = context.Process(
+                target = run_instance,
+                args = (parameters, instance_directory, search_arguments)
+            )
+            process.start()
+            process.join(timeout)
+            timed_out = process.is_alive()
+            if timed_out:
+                # the instance saves the statistics of its search,
+                # then it is killed with the processes it started
+                os.kill(process.pid, signal.SIGTERM)
+                process.join(TIMEOUT_GRACE)
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    # no process of the group is left
+                    pass
+                process.join()
+            # stages finished before the timeout are kept
+            result = dict(parameters=parameters, stages=dict(), sizes=dict(), time=0.0)
+            if os.path.exists(result_file):
+                with open(result_file) as f:
+                    result = json.load(f)
+            if timed_out:
+                result["status"] = "timeout"
+                result["time"] = timeout
+            elif process.exitcode != 0:
+                # e.g. killed for lack of memory
+                result["status"] = "crashed"
+                result["error"] = "exit code " + str(process.exitcode)
+            results.append(result)
+            print(
+                " ".join("{}={}".format(name, value) for name, value in parameters.items()),
+                result["status"],
+                "{:.3f}s".format(result["time"]),
+                result.get("error", ""),
+                flush=True
+            )
+            # partial results are kept if the benchmark is interrupted
+            with open(output, "w") as f:
+                json.dump(results, f, indent=4)
+    return results
+
+if __name__ == "__main__":
+    input_parser = argparse.ArgumentParser(description="scaling benchmarks on generated token passing systems")
+    input_parser.add_argument(
+        "--propositions",
+        help="numbers of atomic propositions in the symbol mapping",
+        type=int,
+        nargs="+",
+        default=[1]
+    )
+    input_parser.add_argument(
+        "--trace_quantifiers",
+        help="numbers of trace quantifiers of the formula",
+        type=int,
+        nargs="+",
+        default=[2]
+    )
+    input_parser.add_argument(
+        "--system_states",
+        help="numbers of states of the system transducer (at least 3)",
+        type=int,
+        nargs="+",
+        default=[3]
+    )
+    input_parser.add_argument(
+        "--depth",
+        help="nesting depths of the temporal operators of the formula",
+        type=int,
+        nargs="+",
+        default=[1]
+    )
+    input_parser.add_argument(
+        "--max_states",
+        help="maximum number of states of the advice bits",
+        type=int,
+        nargs="+",
+        default=[2]
+    )
+    input_parser.add_argument(
+        "--search_arguments",
+        help="other arguments of check.py used in the search (e.g. \"--compress_alphabet --bounded_check 3\")",
+        default="",
+        required=False
+    )
+    input_parser.add_argument(
+        "--timeout",
+        help="time limit of one instance in seconds",
+        type=float,
+        default=300,
+        required=False
+    )
+    input_parser.add_argument(
+        "--output",
+        help="JSON file with the results",
+        default="benchmark.json",
+        required=False
+    )
+    args = vars(input_parser.parse_args())
+
+    names = ["propositions", "trace_quantifiers", "system_states", "depth", "max_states"]
+    parameter_grid = [
+        dict(zip(names, values))
+        for values in itertools.product(*[args[name] for name in names])
+    ]
+    run_benchmark(parameter_grid, shlex.split(args["search_arguments"]), args["timeout"], args["output"])
@@ -0,0 +1,137 @@
+import automata
+import numpy
+
+# explicit-state checks of candidates on small instances of the system
+# (configurations are enumerated up to the given length)
+
+def get_symbol_width(aut: automata.Automaton) -> int:
+    symbols = aut.alphabet.get_symbol_map().keys()
+    return len(next(iter(symbols))) if len(symbols) > 0 else 0
+
+def get_successors(aut: automata.Automaton) -> dict:
+    # state -> list of (symbol as a string, target)
+    width = get_symbol_width(aut)
+    successors = dict()
+    for t in aut.automaton.iterate():
+        successors.setdefault(t.source, list()).append((format(t.symbol, "0" + str(width) + "b"), t.target))
+    return successors
+
+def enumerate_words(aut: automata.Automaton, bound: int, max_words: int) -> list:
+    # accepted words of length 1..bound (at most max_words of each length)
+    successors = get_successors(aut)
+    final_states = set(aut.automaton.final_states)
+    words = list()
+    # prefixes with the sets of reached states
+    layer = {tuple(): frozenset(aut.automaton.initial_states)}
+    for _ in range(bound):
+        next_layer = dict()
+        for prefix, states in layer.items():
+            targets = dict()
+            for state in states:
+                for symbol, target in successors.get(state, []):
+                    targets.setdefault(symbol, set()).add(target)
+            for symbol, symbol_targets in targets.items():
+                if len(next_layer) < max_words:
+                    next_layer[prefix + (symbol,)] = frozenset(symbol_targets)
+        words += [list(word) for word, states in next_layer.items() if len(states & final_states) > 0]
+        layer = next_layer
+    return words
+
+def get_images(word: list, transducer: automata.Automaton, successors: dict) -> list:
+    # words y with (word, y) accepted by the transducer
+    final_states = set(transducer.automaton.final_states)
+    runs = {(tuple(), state) for state in transducer.automaton.initial_states}
+    for symbol in word:
+        runs = {
+            (image + (next_symbol[len(symbol):],), target)
+            for image, state in runs
+            for next_symbol, target in successors.get(state, [])
+            if next_symbol[:len(symbol)] == symbol
+        }
+    return [list(image) for image, state in runs if state in final_states]
+
+class BoundedFalsifier:
+    def __init__(
+        self,
+        restricted_initial_conf: automata.Automaton,
+        restricted_transducer: automata.Automaton,
+        bound: int,
+        steps = None,
+        max_words = 10000
+    ):
+        self.bound = bound
+        # projected initial configurations (have to be accepted by the projected invariant)
+        initial_projected = automata.remove_configuration_tape(restricted_initial_conf)
+        self.initial_words = group_by_length(enumerate_words(initial_projected, bound, max_words))
+
+        # configurations reachable in at most steps steps of the system
+        # ((x, x) must not be in the relation)
+        configurations = enumerate_words(restricted_initial_conf, bound, max_words)
+        if get_symbol_width(restricted_transducer) == 2 * get_symbol_width(restricted_initial_conf):
+            successors = get_successors(restricted_transducer)
+            visited = set(tuple(word) for word in configurations)
+            layer = configurations
+            for _ in range(bound if steps == None else steps):
+                next_layer = list()
+                for word in layer:
+                    for image in get_images(word, restricted_transducer, successors):
+                        if tuple(image) not in visited and len(visited) < max_words:
+                            visited.add(tuple(image))
+                            next_layer.append(image)
+                layer = next_layer
+            configurations = [list(word) for word in visited]
+        self.diagonal_words = group_by_length([[symbol + symbol for symbol in word] for word in configurations])
+
+    def check_initial(self, invariant_projected: automata.Automaton) -> tuple:
+        return find_rejected_word(invariant_projected, self.initial_words)
+
+    def check_irreflexivity(self, relation: automata.Automaton) -> tuple:
+        return find_accepted_word(relation, self.diagonal_words)
+
+def group_by_length(words: list) -> dict:
+    # length -> list of words
+    groups = dict()
+    for word in words:
+        groups.setdefault(len(word), list()).append(word)
+    return groups
+
+def simulate(aut: automata.Automaton, words: list) -> numpy.ndarray:
+    # bit-parallel simulation of the automaton on words of the same length
+    # -> boolean array (word accepted)
+    width = get_symbol_width(aut)
+    num_states = aut.automaton.num_of_states()
+    codes = sorted(set(t.symbol for t in aut.automaton.iterate()))
+    # transition matrix for each used symbol, the last one for the other symbols
+    matrices = numpy.zeros((len(codes) + 1, num_states, num_states), dtype=numpy.int32)
+    code_index = {code: index for index, code in enumerate(codes)}
+    for t in aut.automaton.iterate():
+        matrices[code_index[t.symbol], t.source, t.target] = 1
+
+    symbols = numpy.array(
+        [[code_index.get(int(symbol, 2), len(codes)) for symbol in word] for word in words],
+        dtype=numpy.int64
+    ).reshape(len(words), -1)
+    states = numpy.zeros((len(words), num_states), dtype=numpy.int32)
+    states[:, list(aut.automaton.initial_states)] = 1
+    for i in range(symbols.shape[1]):
+        states = (numpy.einsum("bk,bkj->bj", states, matrices[symbols[:, i]]) > 0).astype(numpy.int32)
+
+    final_states = numpy.zeros(num_states, dtype=bool)
+    final_states[list(aut.automaton.final_states)] = True
+    return states[:, final_states].any(axis=1)
+
+def find_rejected_word(aut: automata.Automaton, words: dict) -> tuple:
+    # returns (True, None) if all words are accepted, otherwise (False, shortest rejected word)
+    for length in sorted(words.keys()):
+        accepted = simulate(aut, words[length])
+        if not accepted.all():
+            return (False, words[length][int(numpy.argmin(accepted))])
+    return (True, None)
+
+def find_accepted_word(aut: automata.Automaton, words: dict) -> tuple:
+    # returns (True, None) if all words are rejected, otherwise (False, shortest accepted word)
+    for length in sorted(words.keys()):
+        accepted = simulate(aut, words[length])
+        if accepted.any():
+            return (False, words[length][int(numpy.argmax(accepted))])
+    return (True, None)
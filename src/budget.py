@@ -0,0 +1,255 @@
+import automata
+import libmata.nfa.nfa as mata_nfa
+import contextlib
+import faulthandler
+import os
+import resource
+import signal
+import time
+
+# time and memory budgets of the stages of the run
+# time: interval timer, memory: size of the address space above its size at the start of the stage,
+#   sampled every MEMORY_SAMPLING seconds of CPU time
+# the signal handlers only record the exceeded budget, BudgetExceeded is raised at a safe point:
+#   in the constructions of automata of this project (CONSTRUCTIONS, between calls of the automata library),
+#   or when check() is called (iterations of the CEGIS loop, between the checks of a candidate),
+#   never in the code of libmata or pysat or while a checkpoint is saved
+#   (the timer is restarted every SAFE_POINT_RETRY seconds until a safe point is reached)
+# a single call that allocates twice the budget hits the limit of the address space (RLIMIT_AS)
+#   -> MemoryError, or the run is aborted with the traceback of the construction (libmata does not
+#   convert all failed allocations)
+# budgets are disabled by default -> stage() returns a context that does nothing
+
+STAGES = ["load_system", "restrict_system", "load_candidates", "search", "check"]
+# constructions of automata reported when a budget is exceeded,
+# (file, function) -> name of the construction, the innermost one on the stack is reported
+# (helpers such as comprehensions or decoding of counterexamples are skipped)
+CONSTRUCTIONS = {
+    ("automata.py", "get_initial_configurations"): "automata.get_initial_configurations",
+    ("automata.py", "parse_transducer_from_file"): "automata.parse_transducer_from_file",
+    ("automata.py", "load_nfa_from_file"): "automata.load_nfa_from_file",
+    ("automata.py", "union"): "automata.union",
+    ("automata.py", "intersection"): "automata.intersection",
+    ("automata.py", "is_intersection_empty"): "automata.is_intersection_empty",
+    ("automata.py", "find_shortest_counterexample"): "automata.find_shortest_counterexample",
+    ("automata.py", "complement"): "automata.complement",
+    ("automata.py", "minimize"): "automata.minimize",
+    ("automata.py", "determinize"): "automata.determinize",
+    ("automata.py", "get_canonical_form"): "automata.get_canonical_form",
+    ("automata.py", "create_multitape_automaton"): "automata.create_multitape_automaton",
+    ("automata.py", "restrict_automaton_with_formula"): "automata.restrict_automaton_with_formula",
+    ("automata.py", "create_multitape_transducer"): "automata.create_multitape_transducer",
+    ("automata.py", "restrict_transducer_with_formula"): "automata.restrict_transducer_with_formula",
+    ("automata.py", "remove_configuration_tape"): "automata.remove_configuration_tape",
+    ("invariant_conditions.py", "get_projected"): "invariant_conditions.InvariantArtefacts.get_projected",
+    ("invariant_conditions.py", "get_cylindrified"): "invariant_conditions.InvariantArtefacts.get_cylindrified",
+    ("invariant_conditions.py", "precompute"): "invariant_conditions.VerificationContext.precompute",
+    ("invariant_conditions.py", "extend_automaton_to_transducer"): "invariant_conditions.extend_automaton_to_transducer",
+    ("invariant_conditions.py", "project_transducer_to_automaton"): "invariant_conditions.project_transducer_to_automaton",
+    ("invariant_conditions.py", "create_cylindrified_system_transducer"): "invariant_conditions.create_cylindrified_system_transducer",
+    ("invariant_conditions.py", "process_all_trace_quantifiers"): "invariant_conditions.process_all_trace_quantifiers",
+    ("invariant_conditions.py", "complement_transducer"): "invariant_conditions.complement_transducer",
+    ("invariant_conditions.py", "create_left_side_transducer"): "invariant_conditions.create_left_side_transducer",
+    ("invariant_conditions.py", "get_transducer_post"): "invariant_conditions.get_transducer_post",
+    ("invariant_conditions.py", "check_initial_invariant_condition"): "invariant_conditions.check_initial_invariant_condition",
+    ("invariant_conditions.py", "check_invariant_backwards_reachability"): "invariant_conditions.check_invariant_backwards_reachability",
+    ("invariant_conditions.py", "check_transition_invariant_condition"): "invariant_conditions.check_transition_invariant_condition",
+    ("invariant_conditions.py", "is_irreflexive"): "invariant_conditions.is_irreflexive",
+    ("invariant_conditions.py", "is_transitive"): "invariant_conditions.is_transitive",
+    ("formula.py", "make_initial_automaton"): "formula.Formula.make_initial_automaton",
+    ("formula.py", "make_local_constraints_transducer"): "formula.Formula.make_local_constraints_transducer",
+    ("formula.py", "make_eventuality_constraints_transducer"): "formula.Formula.make_eventuality_constraints_transducer",
+    ("bounded_falsifier.py", "__init__"): "bounded_falsifier.BoundedFalsifier",
+    ("bounded_falsifier.py", "simulate"): "bounded_falsifier.simulate"
+}
+
+# files of the constructions -> the exceeded budget is raised there
+SAFE_FILES = set(file_name for file_name, _ in CONSTRUCTIONS.keys())
+
+MEMORY_SAMPLING = 0.05
+SAFE_POINT_RETRY = 0.01
+
+BUDGETS = None
+
+class BudgetExceeded(Exception):
+    def __init__(self, stage: str, kind: str, limit: float, construction = None, sizes = None):
+        self.stage = stage
+        self.kind = kind
+        self.limit = limit
+        self.construction = construction
+        self.sizes = sizes if sizes != None else dict()
+        super().__init__(self.get_message())
+
+    def get_message(self) -> str:
+        unit = "s" if self.kind == "time" else "MB"
+        message = "Budget of stage " + self.stage + " exceeded (" + self.kind + " " + "{:g}".format(self.limit) + " " + unit + ")"
+        if self.construction != None:
+            message += " in " + self.construction
+        if len(self.sizes) > 0:
+            message += ": " + ", ".join(
+                name + " " + str(states) + " states " + str(transitions) + " transitions"
+                for name, (states, transitions) in self.sizes.items()
+            )
+        return message
+
+def get_sizes(variables: dict) -> dict:
+    # (states, transitions) of the automata among the local variables of a construction
+    sizes = dict()
+    for name, value in variables.items():
+        if isinstance(value, automata.Automaton):
+            # (None if the budget is exceeded during its initialization)
+            value = getattr(value, "automaton", None)
+        if isinstance(value, mata_nfa.Nfa):
+            sizes[name] = (value.num_of_states(), value.get_num_of_transitions())
+    return sizes
+
+def find_construction(frame) -> tuple:
+    # innermost construction of the automata on the stack (name, sizes of its automata)
+    while frame != None:
+        name = CONSTRUCTIONS.get((os.path.basename(frame.f_code.co_filename), frame.f_code.co_name))
+        if name != None:
+            return (name, get_sizes(frame.f_locals))
+        frame = frame.f_back
+    return (None, None)
+
+def get_address_space() -> int:
+    # in bytes (Linux)
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+class Budgets:
+    def __init__(self, time_budgets: dict, memory_budgets: dict):
+        # stage -> seconds, stage -> MB
+        self.time_budgets = time_budgets
+        self.memory_budgets = memory_budgets
+        # active stages: (stage, deadline, own deadline), (stage, limit in bytes, own limit)
+        self.deadlines = list()
+        self.memory_limits = list()
+        # exceeded budget that was not raised yet
+        self.pending = None
+
+    def raise_timeout(self, signal_number, frame):
+        # the innermost stage whose own deadline passed
+        now = time.perf_counter()
+        for stage, deadline, own in reversed(self.deadlines):
+            if own and deadline <= now + 1e-3:
+                self.exceeded(frame, stage, "time", self.time_budgets[stage])
+                # not a safe point -> the timer fires again soon
+                signal.setitimer(signal.ITIMER_REAL, SAFE_POINT_RETRY)
+                return
+        # the timer fired early -> wait for the rest
+        if len(self.deadlines) > 0:
+            signal.setitimer(signal.ITIMER_REAL, max(self.deadlines[-1][1] - now, 1e-3))
+
+    def check_memory(self, signal_number, frame):
+        # the innermost stage whose own limit was exceeded
+        # (the memory is sampled periodically -> no retry is needed)
+        size = get_address_space()
+        for stage, limit, own in reversed(self.memory_limits):
+            if own and size > limit:
+                self.exceeded(frame, stage, "memory", self.memory_budgets[stage])
+                return
+
+    def exceeded(self, frame, stage: str, kind: str, limit: float):
+        # records the exceeded budget, raises it if the signal interrupted a construction
+        # (the construction and its automata are taken when the budget is exceeded for the first time)
+        if self.pending == None:
+            construction, sizes = find_construction(frame)
+            self.pending = BudgetExceeded(stage, kind, limit, construction, sizes)
+        if os.path.basename(frame.f_code.co_filename) in SAFE_FILES:
+            self.check()
+
+    def check(self):
+        # safe point -> the exceeded budget is raised
+        if self.pending != None:
+            exception = self.pending
+            self.pending = None
+            raise exception
+
+    def set_timer(self):
+        if len(self.deadlines) == 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            return
+        remaining = self.deadlines[-1][1] - time.perf_counter()
+        if remaining <= 0:
+            # the exception of the expired stage is already raised
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            return
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        seconds = self.time_budgets.get(name)
+        megabytes = self.memory_budgets.get(name)
+        if seconds != None:
+            # deadline of a nested stage is not later than the deadline of the outer stage
+            deadline = time.perf_counter() + seconds
+            if len(self.deadlines) > 0 and self.deadlines[-1][1] <= deadline:
+                self.deadlines.append((name, self.deadlines[-1][1], False))
+            else:
+                self.deadlines.append((name, deadline, True))
+            signal.signal(signal.SIGALRM, self.raise_timeout)
+            self.set_timer()
+        if megabytes != None:
+            size = get_address_space()
+            limit = size + int(megabytes * 2**20)
+            # limit of a nested stage is not larger than the limit of the outer stage
+            if len(self.memory_limits) > 0 and self.memory_limits[-1][1] <= limit:
+                self.memory_limits.append((name, self.memory_limits[-1][1], False))
+            else:
+                self.memory_limits.append((name, limit, True))
+            if len(self.memory_limits) == 1:
+                signal.signal(signal.SIGPROF, self.check_memory)
+                signal.setitimer(signal.ITIMER_PROF, MEMORY_SAMPLING, MEMORY_SAMPLING)
+            # hard limit for allocations in a single call
+            soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+            hard_limit = size + int(2 * megabytes * 2**20)
+            own_hard_limit = soft == resource.RLIM_INFINITY or hard_limit < soft
+            if own_hard_limit:
+                resource.setrlimit(resource.RLIMIT_AS, (hard_limit if hard == resource.RLIM_INFINITY else min(hard_limit, hard), hard))
+        try:
+            yield
+            # the stage ended before a safe point was reached -> its result is kept
+            if self.pending != None and self.pending.stage == name:
+                self.pending = None
+        except MemoryError as e:
+            if megabytes == None or not self.memory_limits[-1][2]:
+                raise
+            # the innermost frame of the traceback is where the allocation failed
+            traceback = e.__traceback__
+            while traceback.tb_next != None:
+                traceback = traceback.tb_next
+            construction, sizes = find_construction(traceback.tb_frame)
+            raise BudgetExceeded(name, "memory", megabytes, construction, sizes) from None
+        finally:
+            if megabytes != None:
+                if own_hard_limit:
+                    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+                self.memory_limits.pop()
+                if len(self.memory_limits) == 0:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+            if seconds != None:
+                self.deadlines.pop()
+                self.set_timer()
+
+def enable(time_budgets: dict, memory_budgets: dict):
+    global BUDGETS
+    BUDGETS = Budgets(time_budgets, memory_budgets)
+    # traceback of the construction if libmata aborts the run
+    faulthandler.enable()
+
+def is_limited(name: str) -> bool:
+    # the stage has a time or memory budget
+    if BUDGETS == None:
+        return False
+    return name in BUDGETS.time_budgets or name in BUDGETS.memory_budgets
+
+def stage(name: str):
+    if BUDGETS == None:
+        return contextlib.nullcontext()
+    return BUDGETS.stage(name)
+
+def check():
+    # raises an exceeded budget of a running stage
+    if BUDGETS != None:
+        BUDGETS.check()
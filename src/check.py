@@ -5,68 +5,111 @@ from formula import Formula
 import automata
 import invariant_conditions
 import sat_solver
+import artefact_cache
+import tracing
+import instrumentation
+import budget
 import libmata.nfa.nfa as mata_nfa
 from libmata import parser, alphabets, plotting
-import time 
-import sys 
+import time
+import sys
 import itertools
+import json
 
-if __name__ == "__main__":
-    start = time.time()
-    
-    grammar_parser = parse.create_parser("grammar.txt")
-    args = parse.parse_command_line_arguments()
+# stages of the verification (also run in-process by the benchmark and the batch mode)
 
+def load_shared_system(args: dict) -> dict:
+    # artefacts that do not depend on the formula (shared by the jobs of the batch mode)
     # get symbol mapping
     with open(args["symbol_mapping"]) as f:
         symbol_map = f.read().splitlines()
 
     # load initial configuration of a system (.mata)
-    initial_configurations = automata.get_initial_configurations(
-        args["initial_config"],
-        symbol_map
+    with tracing.span("initial_configurations") as span:
+        initial_configurations = automata.get_initial_configurations(
+            args["initial_config"],
+            symbol_map
+        )
+        span.set_outputs([initial_configurations])
+
+    # parse system transducer from file
+    with tracing.span("system_transducer") as span:
+        system_transducer = automata.parse_transducer_from_file(
+            args["system_transducer"],
+            symbol_map
+        )
+        span.set_outputs([system_transducer])
+
+    return dict(
+        symbol_map = symbol_map,
+        initial_configurations = initial_configurations,
+        system_transducer = system_transducer
     )
-    atomic_propositions = initial_configurations.atomic_propositions
+
+def load_system(args: dict, grammar_parser, shared = None) -> dict:
+    # shared artefacts are loaded from the files if they are not given
+    if shared == None:
+        shared = load_shared_system(args)
+    atomic_propositions = shared["initial_configurations"].atomic_propositions
 
     # parse formula into tree
-    with open(args["formula"]) as f:
-        input_formula = f.read()
-    tree = grammar_parser.parse(input_formula)
-    formula = Formula(tree, atomic_propositions)
+    with tracing.span("parse_formula"):
+        with open(args["formula"]) as f:
+            input_formula = f.read()
+        tree = grammar_parser.parse(input_formula)
+        formula = Formula(tree, atomic_propositions)
     # print formula parsed into Buchi Normal Form
     formula.print_formula()
 
     # create automaton for initial mso formula
-    formula.make_initial_automaton()
-
-    # parse system transducer from file
-    system_transducer = automata.parse_transducer_from_file(
-        args["system_transducer"],
-        symbol_map 
-    )
+    with tracing.span("initial_automaton") as span:
+        formula.make_initial_automaton()
+        span.set_outputs([formula.mso_initial_automaton])
 
     # create transducer for local constraints of mso formula
-    formula.make_local_constraints_transducer()
+    with tracing.span("local_constraints_transducer") as span:
+        formula.make_local_constraints_transducer()
+        span.set_outputs([formula.mso_local_constraints_transducer])
 
-    # extended transducer for the system
-    restricted_transducer = automata.restrict_transducer_with_formula(
-       system_transducer,
-       formula.mso_local_constraints_transducer,
-       formula.trace_quantifiers_list
+    return dict(
+        symbol_map = shared["symbol_map"],
+        initial_configurations = shared["initial_configurations"],
+        formula = formula,
+        system_transducer = shared["system_transducer"]
     )
 
-    # extended initial configurations with MSO formula
-    restricted_initial_conf = automata.restrict_automaton_with_formula(
-        initial_configurations, 
-        formula.mso_initial_automaton,
-        formula.trace_quantifiers_list,
-        restricted_transducer.symbol_map.copy()[-1]
-    )
+def restrict_system(args: dict, system: dict):
+    formula = system["formula"]
+    # extended transducer for the system and extended initial configurations with MSO formula
+    # (optionally reused from the cache of previous runs)
+    cache = None
+    if args["cache_dir"] != None:
+        cache = artefact_cache.ArtefactCache(args["cache_dir"], args["cache_size"] * 2**20)
+    inputs = [
+        system["system_transducer"],
+        system["initial_configurations"],
+        formula.mso_local_constraints_transducer,
+        formula.mso_initial_automaton
+    ]
+    with tracing.span("restricted_system", inputs, disk_cache=cache != None) as span:
+        restricted_transducer, restricted_initial_conf = artefact_cache.get_restricted_system(
+            cache,
+            *inputs,
+            formula.trace_quantifiers_list
+        )
+        span.set_outputs([restricted_transducer, restricted_initial_conf])
+    system["restricted_transducer"] = restricted_transducer
+    system["restricted_initial_conf"] = restricted_initial_conf
 
     # transducer for eventuality constraints
-    formula.make_eventuality_constraints_transducer()
+    with tracing.span("eventuality_constraints_transducer") as span:
+        formula.make_eventuality_constraints_transducer()
+        span.set_outputs([formula.mso_eventuality_constraints_transducer])
+
+def load_candidates(args: dict, system: dict) -> tuple:
+    formula = system["formula"]
     # optional transducer for the relation
-    relation = None 
+    relation = None
     if args["relation"] != None:
         tmp_map = formula.mso_eventuality_constraints_transducer.symbol_map.copy()
         tmp_map = tmp_map[:int(len(tmp_map)/2)]
@@ -80,34 +123,106 @@ if __name__ == "__main__":
     # optional invariant
     invariant = None
     if args["invariant"] != None:
-        invariant_symbol_map = restricted_initial_conf.symbol_map.copy()
+        invariant_symbol_map = system["restricted_initial_conf"].symbol_map.copy()
         invariant_symbol_map[-1] = sorted(invariant_symbol_map[-1])
         invariant = automata.get_automaton_with_configuration_tape(
             args["invariant"],
             invariant_symbol_map
         )
         invariant.symbol_map = invariant_symbol_map.copy()
+    return (relation, invariant)
 
+def get_search_arguments(args: dict, system: dict, relation, invariant) -> dict:
     # conditions for SAT solver
-    # get only used symbols (not the whole alphabet)
-    used_alphabet = restricted_transducer.get_used_symbols()
-    A, T = sat_solver.find_solution(
-        k_aut = int(args["max_states"]), 
-        restricted_initial_conf = restricted_initial_conf,
-        restricted_transducer = restricted_transducer,
-        original_transducer = system_transducer,
-        accepting_transitions = formula.mso_eventuality_constraints_transducer,
-        trace_quantifiers = formula.trace_quantifiers_list,
+    return dict(
+        k_aut = int(args["max_states"]),
+        restricted_initial_conf = system["restricted_initial_conf"],
+        restricted_transducer = system["restricted_transducer"],
+        original_transducer = system["system_transducer"],
+        accepting_transitions = system["formula"].mso_eventuality_constraints_transducer,
+        trace_quantifiers = system["formula"].trace_quantifiers_list,
         T_aut = relation,
         A_aut = invariant,
-        relation_bound = args["relation_bound"] 
-    ) 
+        relation_bound = args["relation_bound"],
+        pipeline_workers = args["pipeline"],
+        pipeline_queue = args["pipeline_queue"],
+        check_stats = args["check_stats"],
+        fixed_check_order = args["fixed_check_order"],
+        deterministic = args["deterministic"],
+        amo_encoding = args["amo_encoding"],
+        compress_alphabet = args["compress_alphabet"],
+        candidate_cache = args["candidate_cache"],
+        bounded_check = args["bounded_check"],
+        checkpoint = args["checkpoint"],
+        checkpoint_interval = args["checkpoint_interval"],
+        resume = args["resume"]
+    )
+
+def search(args: dict, search_arguments: dict, show_progress = True) -> tuple:
+    if args["portfolio"] != None:
+        # several SAT solvers in parallel
+        if args["portfolio"] == "default":
+            solver_names = sat_solver.PORTFOLIO_SOLVERS
+        else:
+            solver_names = args["portfolio"].split(",")
+        return sat_solver.find_solution_portfolio(solver_names, **search_arguments)
+    A, T = sat_solver.find_solution(**search_arguments, solver_name=args["solver"], show_progress=show_progress)
+    return (A, T, args["solver"])
+
+if __name__ == "__main__":
+    start = time.time()
+
+    grammar_parser = parse.create_parser("grammar.txt")
+    args = parse.parse_command_line_arguments()
+
+    if args["trace"] != None:
+        tracing.enable(args["trace"])
+    if args["op_stats"] != None:
+        instrumentation.enable(args["op_stats"], args["op_stats_top"])
+    if len(args["time_budget"]) > 0 or len(args["memory_budget"]) > 0:
+        budget.enable(args["time_budget"], args["memory_budget"])
+    try:
+        with tracing.span("check"):
+            with tracing.span("load_system"), budget.stage("load_system"):
+                system = load_system(args, grammar_parser)
+            with tracing.span("restrict_system"), budget.stage("restrict_system"):
+                restrict_system(args, system)
+            with tracing.span("load_candidates") as span, budget.stage("load_candidates"):
+                relation, invariant = load_candidates(args, system)
+                span.set_outputs([relation, invariant])
+            with tracing.span("search") as span, budget.stage("search"):
+                A, T, winner = search(args, get_search_arguments(args, system, relation, invariant))
+                span.set_outputs([A, T])
+    except budget.BudgetExceeded as e:
+        # no cheaper strategy for the whole stage
+        print(e)
+        if e.stage == "search" and args["checkpoint"] != None:
+            print("The search can be continued with --resume")
+        sys.exit(1)
+    finally:
+        tracing.disable()
+    if args["trace_folded"] != None:
+        tracing.export_folded_stacks(args["trace"], args["trace_folded"])
+
+    end = time.time()
+    if args["portfolio_log"] != None:
+        # record the winning backend for the benchmark family
+        with open(args["portfolio_log"], "a") as f:
+            f.write(json.dumps({
+                "formula": args["formula"],
+                "system_transducer": args["system_transducer"],
+                "max_states": args["max_states"],
+                "solver": winner,
+                "solved": (A,T) != (None, None),
+                "time": end-start
+            }) + "\n")
 
     if (A,T) == (None, None):
         print("Solution was not found for", args["max_states"], "states")
     else:
-        end = time.time()
+        if args["portfolio"] != None:
+            print("Solution was found by", winner)
         print("Solution was found in", end-start, "seconds")
         # save the advice bits
         A.save_automaton(name="A")
-        T.save_automaton(name="T")
\ No newline at end of file
+        T.save_automaton(name="T")
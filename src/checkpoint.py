@@ -0,0 +1,119 @@
+import artefact_cache
+import json
+import os
+import signal
+import sys
+import time
+
+# checkpoints of the CEGIS loop (find_solution):
+# parameters of the encoding, classes of symbols of A and T (their order depends on the hash seed),
+# state of the VariablePool and all clauses added to the solver after the encoding of the automata
+# (blocking clauses of the tried candidates and clauses learned from their counterexamples)
+
+VERSION = 1
+
+class RecordingSolver:
+    # pysat solver that remembers the clauses added while recording is on
+    def __init__(self, solver):
+        self.solver = solver
+        self.recording = False
+        self.clauses = list()
+
+    def add_clause(self, clause, no_return = True):
+        if self.recording:
+            self.clauses.append([int(literal) for literal in clause])
+        return self.solver.add_clause(clause, no_return)
+
+    def __getattr__(self, name):
+        return getattr(self.solver, name)
+
+def get_problem(parameters: dict, automata_dict: dict) -> dict:
+    # checkpoints are only resumed with the same encoding and the same automata
+    # (content hash of every automaton, None for missing automata)
+    problem = dict(parameters)
+    for name, aut in automata_dict.items():
+        problem["automaton." + name] = artefact_cache.get_key([aut]) if aut != None else None
+    return problem
+
+class Checkpoint:
+    def __init__(self, file_name: str, interval: float, problem: dict):
+        self.file_name = file_name
+        self.interval = interval
+        self.problem = problem
+        self.symbol_classes = dict()
+        self.setup_variables = 0
+        self.last_save = time.perf_counter()
+        # last state between two iterations (number of clauses, top variable, iterations)
+        self.mark = (0, 0, 0)
+        self.previous_handler = None
+
+    def start(self, pool, solver: RecordingSolver, symbol_classes: dict, iterations = 0):
+        # called after the encoding of the automata
+        self.symbol_classes = symbol_classes
+        self.setup_variables = pool.top
+        self.mark = (len(solver.clauses), pool.top, iterations)
+        solver.recording = True
+        # termination by the scheduler -> SystemExit in the CEGIS loop (the last state is saved)
+        self.previous_handler = signal.signal(signal.SIGTERM, exit_on_signal)
+
+    def stop(self):
+        if self.previous_handler != None:
+            signal.signal(signal.SIGTERM, self.previous_handler)
+            self.previous_handler = None
+
+    def update(self, pool, solver: RecordingSolver, iterations: int):
+        # called when all clauses of an iteration were added (the candidate was checked)
+        self.mark = (len(solver.clauses), pool.top, iterations)
+        if time.perf_counter() - self.last_save >= self.interval:
+            self.save(pool, solver)
+
+    def save(self, pool, solver: RecordingSolver):
+        # state of the last finished iteration
+        # (a blocked candidate of an unfinished iteration was not checked yet)
+        number_of_clauses, top, iterations = self.mark
+        data = dict(
+            version = VERSION,
+            problem = self.problem,
+            symbol_classes = self.symbol_classes,
+            setup_variables = self.setup_variables,
+            pool = pool.get_state(top),
+            iterations = iterations,
+            clauses = solver.clauses[:number_of_clauses]
+        )
+        # the previous checkpoint is kept if the run is killed while saving
+        with open(self.file_name + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(self.file_name + ".tmp", self.file_name)
+        self.last_save = time.perf_counter()
+
+def exit_on_signal(signal_number, frame):
+    sys.exit(128 + signal_number)
+
+def load_checkpoint(file_name: str, problem: dict) -> dict:
+    with open(file_name) as f:
+        data = json.load(f)
+    if data.get("version") != VERSION:
+        raise ValueError("Checkpoint " + file_name + " has an unsupported version")
+    for name in sorted(set(problem.keys()) | set(data["problem"].keys())):
+        if problem.get(name) != data["problem"].get(name):
+            raise ValueError(
+                "Checkpoint " + file_name + " was created with a different " + name +
+                " (" + str(data["problem"].get(name)) + " instead of " + str(problem.get(name)) + ")"
+            )
+    return data
+
+def restore_symbol_classes(inv, symbol_classes: list):
+    # the same symbols in the order of the checkpoint
+    if sorted(map(sorted, symbol_classes)) != sorted(map(sorted, inv.symbol_classes)):
+        raise ValueError("Checkpoint was created with different symbols of " + inv.name)
+    inv.set_symbol_classes(symbol_classes)
+
+def restore(data: dict, pool, solver: RecordingSolver) -> int:
+    # adds the saved clauses to the solver after the encoding of the automata,
+    # returns the number of finished iterations
+    if pool.top != data["setup_variables"]:
+        raise ValueError("Checkpoint was created with a different encoding of the automata")
+    pool.set_state(data["pool"])
+    for clause in data["clauses"]:
+        solver.add_clause(clause)
+    return data["iterations"]
@@ -0,0 +1,181 @@
+import automata
+import libmata.nfa.nfa as mata_nfa
+import atexit
+import functools
+import heapq
+import json
+import os
+import sys
+import time
+
+# statistics of automata operations (calls, time, sizes of inputs and outputs, call sites)
+# the operations are replaced by wrappers only when enabled -> no overhead otherwise
+
+# (module, name of the operation)
+OPERATIONS = [
+    (automata, "union"),
+    (automata, "intersection"),
+    (automata, "complement"),
+    (automata, "determinize"),
+    (automata, "minimize"),
+    (automata, "get_canonical_form"),
+    (automata, "is_intersection_empty"),
+    (automata, "find_shortest_counterexample"),
+    (mata_nfa, "is_included"),
+    (mata_nfa, "is_included_with_cex")
+]
+
+class OperationStatistics:
+    def __init__(self, operation: str, call_site: str):
+        self.operation = operation
+        self.call_site = call_site
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.max_input_states = 0
+        self.max_input_transitions = 0
+        self.max_output_states = 0
+        self.max_output_transitions = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "call_site": self.call_site,
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.calls if self.calls > 0 else 0.0,
+            "max_time": self.max_time,
+            "max_input_states": self.max_input_states,
+            "max_input_transitions": self.max_input_transitions,
+            "max_output_states": self.max_output_states,
+            "max_output_transitions": self.max_output_transitions
+        }
+
+class Instrumentation:
+    def __init__(self, top = 20):
+        self.top = top
+        # (operation, call site) -> OperationStatistics
+        self.statistics = dict()
+        # the slowest single calls (min-heap of (time, counter, record))
+        self.slowest = list()
+        self.counter = 0
+        self.originals = list()
+
+    def record(self, operation: str, call_site: str, duration: float, inputs: tuple, outputs: tuple):
+        key = (operation, call_site)
+        if key not in self.statistics:
+            self.statistics[key] = OperationStatistics(operation, call_site)
+        stats = self.statistics[key]
+        stats.calls += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+        stats.max_input_states = max(stats.max_input_states, inputs[0])
+        stats.max_input_transitions = max(stats.max_input_transitions, inputs[1])
+        stats.max_output_states = max(stats.max_output_states, outputs[0])
+        stats.max_output_transitions = max(stats.max_output_transitions, outputs[1])
+
+        self.counter += 1
+        call = (duration, self.counter, {
+            "operation": operation,
+            "call_site": call_site,
+            "time": duration,
+            "input_states": inputs[0],
+            "input_transitions": inputs[1],
+            "output_states": outputs[0],
+            "output_transitions": outputs[1]
+        })
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, call)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, call)
+
+    def wrap(self, operation: str, function):
+        @functools.wraps(function)
+        def wrapper(*arguments, **keyword_arguments):
+            caller = sys._getframe(1)
+            call_site = "{}:{}:{}".format(
+                os.path.basename(caller.f_code.co_filename),
+                caller.f_lineno,
+                caller.f_code.co_name
+            )
+            inputs = get_sizes(list(arguments) + list(keyword_arguments.values()))
+            start = time.perf_counter()
+            result = function(*arguments, **keyword_arguments)
+            duration = time.perf_counter() - start
+            self.record(operation, call_site, duration, inputs, get_sizes([result]))
+            return result
+        return wrapper
+
+    def install(self):
+        for module, name in OPERATIONS:
+            original = getattr(module, name)
+            self.originals.append((module, name, original))
+            setattr(module, name, self.wrap(name, original))
+
+    def uninstall(self):
+        for module, name, original in self.originals:
+            setattr(module, name, original)
+        self.originals = list()
+
+    def get_most_expensive(self) -> list:
+        return sorted(self.statistics.values(), key=lambda stats: stats.total_time, reverse=True)[:self.top]
+
+    def get_slowest_calls(self) -> list:
+        return [call for _, _, call in sorted(self.slowest, reverse=True)]
+
+    def report(self) -> str:
+        # sizes are the largest numbers of states of the inputs and of the output
+        width = max([len(stats.call_site) for stats in self.statistics.values()] + [9]) + 2
+        lines = [("{:<30}{:<" + str(width) + "}{:>8}{:>12}{:>12}{:>12}{:>12}").format(
+            "operation", "call site", "calls", "total time", "max time", "max in", "max out"
+        )]
+        for stats in self.get_most_expensive():
+            lines.append(("{:<30}{:<" + str(width) + "}{:>8}{:>12.4f}{:>12.4f}{:>12}{:>12}").format(
+                stats.operation,
+                stats.call_site,
+                stats.calls,
+                stats.total_time,
+                stats.max_time,
+                stats.max_input_states,
+                stats.max_output_states
+            ))
+        return "\n".join(lines)
+
+    def dump(self, file_name: str):
+        with open(file_name, "w") as f:
+            json.dump({
+                "operations": [stats.to_dict() for stats in self.get_most_expensive()],
+                "slowest_calls": self.get_slowest_calls()
+            }, f, indent=4)
+
+def get_sizes(values: list) -> tuple:
+    # total number of states and transitions of the automata among the values
+    states, transitions = 0, 0
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            value_states, value_transitions = get_sizes(list(value))
+            states += value_states
+            transitions += value_transitions
+            continue
+        if isinstance(value, automata.Automaton):
+            value = value.automaton
+        if isinstance(value, mata_nfa.Nfa):
+            states += value.num_of_states()
+            transitions += value.get_num_of_transitions()
+    return (states, transitions)
+
+def enable(output = "-", top = 20) -> Instrumentation:
+    # "-" prints the report at exit, otherwise it is saved as JSON
+    instrumentation = Instrumentation(top)
+    instrumentation.install()
+    main_pid = os.getpid()
+    def report():
+        # forked worker processes do not report
+        if os.getpid() != main_pid:
+            return
+        if output == "-":
+            print(instrumentation.report())
+        else:
+            instrumentation.dump(output)
+    atexit.register(report)
+    return instrumentation
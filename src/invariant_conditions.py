@@ -3,13 +3,193 @@ from libmata import parser, alphabets, plotting
 import automata
 import itertools
 
+class InvariantArtefacts:
+    # constructions that depend only on the invariant
+    # -> computed on demand and shared by the checks of all candidates with this invariant
+    def __init__(self, invariant: automata.Automaton):
+        self.invariant = invariant
+        self.projected = None
+        self.cylindrifications = dict()
+        self.cylindrified = None
+
+    def get_projected(self) -> automata.Automaton:
+        # invariant without the configuration tape
+        if self.projected == None:
+            self.projected = automata.remove_configuration_tape(self.invariant)
+        return self.projected
+
+    def get_cylindrification(self, tape_index: int) -> automata.Automaton:
+        # transducer with the invariant on the given tape
+        if tape_index not in self.cylindrifications:
+            self.cylindrifications[tape_index] = extend_automaton_to_transducer(
+                aut = self.invariant,
+                tape_index = tape_index
+            )
+        return self.cylindrifications[tape_index]
+
+    def get_cylindrified(self) -> automata.Automaton:
+        # transducer with the invariant on both tapes
+        if self.cylindrified == None:
+            first = self.get_cylindrification(0)
+            second = self.get_cylindrification(1)
+            self.cylindrified = automata.Automaton(
+                automata.intersection(first, second),
+                first.alphabet,
+                first.symbol_map.copy(),
+                first.number_of_tapes,
+                first.atomic_propositions
+            )
+        return self.cylindrified
+
+class VerificationContext:
+    # constructions that do not depend on the candidate
+    # -> built once per run and combined with A and T in every iteration
+    def __init__(
+        self,
+        extended_initial: automata.Automaton,
+        accepting_trans: automata.Automaton,
+        trace_quantifiers: list,
+        system_transducer: automata.Automaton
+    ):
+        self.extended_initial = extended_initial
+        self.accepting_trans = accepting_trans
+        self.trace_quantifiers = trace_quantifiers
+        self.system_transducer = system_transducer
+        self.initial_projected = None
+        self.initial_cylindrified = None
+        # left side is None if there are no universal quantifiers
+        self.left_side_computed = False
+        self.left_side_transducer = None
+        self.left_side_transducer_neg = None
+        self.left_side_empty = None
+        # sizes of the quantifier blocks during elimination
+        self.block_sizes = dict()
+
+    def precompute(self):
+        self.get_initial_projected()
+        self.get_initial_cylindrified()
+        self.get_left_side_transducer_neg()
+        self.is_left_side_empty()
+        return self
+
+    def is_left_side_empty(self) -> bool:
+        # empty left side -> the implication holds for all words
+        left_side_transducer = self.get_left_side_transducer()
+        if self.left_side_empty == None and left_side_transducer != None:
+            self.left_side_empty = left_side_transducer.automaton.is_lang_empty()
+        return self.left_side_empty
+
+    def get_initial_projected(self) -> automata.Automaton:
+        # initial configurations without the configuration tape
+        if self.initial_projected == None:
+            self.initial_projected = automata.remove_configuration_tape(self.extended_initial)
+        return self.initial_projected
+
+    def get_initial_cylindrified(self) -> automata.Automaton:
+        # cylindrification of extended initial configurations
+        if self.initial_cylindrified == None:
+            self.initial_cylindrified = extend_automaton_to_transducer(
+                aut = self.extended_initial,
+                tape_index = 1
+            )
+        return self.initial_cylindrified
+
+    def get_left_side_transducer(self) -> automata.Automaton:
+        if not self.left_side_computed:
+            self.left_side_transducer = create_left_side_transducer(
+                system_transducer = self.system_transducer,
+                accepting_trans = self.accepting_trans,
+                trace_quantifiers = self.trace_quantifiers
+            )
+            self.left_side_computed = True
+        return self.left_side_transducer
+
+    def get_left_side_transducer_neg(self) -> automata.Automaton:
+        left_side_transducer = self.get_left_side_transducer()
+        if left_side_transducer != None and self.left_side_transducer_neg == None:
+            self.left_side_transducer_neg = automata.Automaton(
+                automata.complement(left_side_transducer),
+                left_side_transducer.alphabet,
+                left_side_transducer.symbol_map.copy(),
+                left_side_transducer.number_of_tapes,
+                left_side_transducer.atomic_propositions
+            )
+        return self.left_side_transducer_neg
+
+class DeferredAutomaton:
+    # node of a construction from intersections and unions
+    # -> the automaton is built only when it is requested,
+    # emptiness is decided on the operands without building the node
+    def __init__(
+        self,
+        automaton: automata.Automaton = None,
+        operation: str = None,
+        operands: list = None,
+        build = None
+    ):
+        self.automaton = automaton
+        self.operation = operation
+        self.operands = operands
+        self.build = build
+        self.empty = None
+
+    def get(self) -> automata.Automaton:
+        if self.automaton == None:
+            if self.build != None:
+                self.automaton = self.build()
+            else:
+                self.automaton = self.combine([operand.get() for operand in self.operands])
+        return self.automaton
+
+    def combine(self, operands: list) -> automata.Automaton:
+        # operands are combined from the left, the result has the symbol map of the last one
+        result = operands[0]
+        for operand in operands[1:]:
+            if self.operation == "intersection":
+                aut = automata.intersection(result, operand)
+            else:
+                aut = automata.union(result, operand)
+            result = automata.Automaton(
+                aut,
+                operand.alphabet,
+                operand.symbol_map.copy(),
+                operand.number_of_tapes,
+                operand.atomic_propositions
+            )
+            result.automaton = automata.minimize(result)
+        return result
+
+    def get_products(self) -> list:
+        # the language of the node is the union of intersections of the returned lists of automata
+        if self.automaton != None:
+            return [[self.automaton]]
+        if self.operation == "union":
+            return [product for operand in self.operands for product in operand.get_products()]
+        products = [[]]
+        for operand in self.operands:
+            products = [product + other for product in products for other in operand.get_products()]
+        return products
+
+    def is_empty(self) -> bool:
+        if self.empty == None:
+            if self.automaton != None:
+                self.empty = self.automaton.automaton.is_lang_empty()
+            else:
+                self.empty = all(
+                    product[0].automaton.is_lang_empty() if len(product) == 1 
+                    else automata.is_intersection_empty(product)
+                    for product in self.get_products()
+                )
+        return self.empty
+
 def get_invariant_from_file(file_name: str, symbol_map: list) -> automata.Automaton:
     number_of_symbols = sum(len(map) for map in symbol_map)
     new_symbol_map = automata.create_symbol_map(number_of_symbols)
     alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(new_symbol_map)
     mata_nfa.store()["alphabet"] = alphabet
-    automaton = parser.from_mata(
+    automaton = automata.load_nfa_from_file(
         file_name,
+        number_of_symbols,
         alphabet
     )
     automaton.label = "Symbols: " + str(symbol_map)
@@ -32,39 +212,50 @@ def get_relation_from_file(file_name: str, symbol_map: list) -> automata.Automat
 
 def check_initial_invariant_condition(
     extended_initial_aut: automata.Automaton,
-    invariant: automata.Automaton
+    invariant: automata.Automaton,
+    artefacts: InvariantArtefacts = None,
+    context: VerificationContext = None
 ):
+    if artefacts == None:
+        artefacts = InvariantArtefacts(invariant)
+
     # 1) remove configuration tapes in both automata
-    initial_projected = automata.remove_configuration_tape(extended_initial_aut)
-    invariant_projected = automata.remove_configuration_tape(invariant)
+    if context != None:
+        initial_projected = context.get_initial_projected()
+    else:
+        initial_projected = automata.remove_configuration_tape(extended_initial_aut)
+    invariant_projected = artefacts.get_projected()
 
     # 2) check if L(initial_projected) subseteq L(invariant_projected)
-    is_subseteq = mata_nfa.is_included_with_cex(
-        lhs = initial_projected.automaton,
-        rhs = invariant_projected.automaton,
-        alphabet = initial_projected.alphabet
-    )
+    # (shortest counterexample)
+    labels = automata.find_shortest_counterexample(initial_projected, invariant_projected)
 
     word = None
-    if not is_subseteq[0]:
-        counterexample = is_subseteq[1]
-        labels = counterexample.word 
+    if labels != None:
         word = initial_projected.get_word_from_labels(labels)
 
     # returns tuple (bool, counterexample_word)
-    return (is_subseteq[0], word) 
+    return (labels == None, word) 
 
 def check_invariant_backwards_reachability(
     invariant: automata.Automaton,
     extended_initial_aut: automata.Automaton,
     relation: automata.Automaton,
     extended_transducer: automata.Automaton,
+    artefacts: InvariantArtefacts = None,
+    context: VerificationContext = None
 ):  
+    if artefacts == None:
+        artefacts = InvariantArtefacts(invariant)
+
     # cylindrification of extended initial configurations
-    extended_initial_cylindrified = extend_automaton_to_transducer(
-        aut = extended_initial_aut,
-        tape_index = 1
-    )
+    if context != None:
+        extended_initial_cylindrified = context.get_initial_cylindrified()
+    else:
+        extended_initial_cylindrified = extend_automaton_to_transducer(
+            aut = extended_initial_aut,
+            tape_index = 1
+        )
 
     # intersection of extended transducer and the relation
     trans_intersection = automata.Automaton(
@@ -85,21 +276,7 @@ def check_invariant_backwards_reachability(
     )
 
     # cylindrified invariant to transducer
-    first = extend_automaton_to_transducer(
-        aut = invariant,
-        tape_index = 0
-    )
-    second = extend_automaton_to_transducer(
-        aut = invariant,
-        tape_index =  1
-    )
-    cylindrified_invariant = automata.Automaton(
-        automata.intersection(first, second),
-        first.alphabet,
-        first.symbol_map.copy(),
-        first.number_of_tapes,
-        first.atomic_propositions
-    )
+    cylindrified_invariant = artefacts.get_cylindrified()
 
     # intersection with cylindrified invariant
     intersection_aut = automata.Automaton(
@@ -116,19 +293,13 @@ def check_invariant_backwards_reachability(
         tape_index_to_remove = 0
     )
 
-    is_subseteq = mata_nfa.is_included_with_cex(
-        lhs = invariant.automaton,
-        rhs = aut_with_removed_tape.automaton,
-        alphabet = invariant.alphabet
-    )
-
-    if not is_subseteq[0]:
-        counterexample = is_subseteq[1]
-        labels = counterexample.word 
+    # shortest counterexample
+    labels = automata.find_shortest_counterexample(invariant, aut_with_removed_tape)
+    if labels != None:
         word = invariant.get_word_from_labels(labels)
-        return (is_subseteq[0], word)
+        return (False, word)
 
-    return is_subseteq
+    return (True, None)
 
 def extend_automaton_to_transducer(
     aut: automata.Automaton, 
@@ -303,53 +474,63 @@ def remove_transducer_configuration_tapes(transducer: automata.Automaton) -> aut
 
     return result 
 
+def get_quantifier_blocks(trace_quantifiers: list) -> list:
+    # consecutive quantifiers of the same kind from the last one
+    # -> list of (kind, trace variables)
+    blocks = list()
+    for quantifier in trace_quantifiers[::-1]:
+        if quantifier[0] != "exists" and quantifier[0] != "forall":
+            raise ValueError("Not a valid quantifier")
+        if len(blocks) > 0 and blocks[-1][0] == quantifier[0]:
+            blocks[-1][1].append(str(quantifier[1]))
+        else:
+            blocks.append((str(quantifier[0]), [str(quantifier[1])]))
+    return blocks
+
 def process_all_trace_quantifiers(
     transducer: automata.Automaton,
-    trace_quantifiers: list
+    trace_quantifiers: list,
+    block_sizes: dict = None
 ) -> automata.Automaton:
-    # start from the last quantifier
-    for i, quantifier in enumerate(trace_quantifiers[::-1]):
-        tape_index = len(trace_quantifiers) - 1 - i
-        if quantifier[0] == "exists":
-            transducer = process_existential_quantifier_on_last_tape(transducer)
-        elif quantifier[0] == "forall":
-            transducer = process_universal_quantifier_on_last_tape(transducer)
-        else:
-            raise ValueError("Not a valid quantifier")
+    # start from the last block of quantifiers, all tapes of a block are removed at once
+    # forall Y . phi <=> ! exists Y . ! phi 
+    # -> the negated automaton is kept while the blocks are universal,
+    # it is complemented only when the kind of quantifiers alternates
+    negated = False
+    for kind, trace_variables in get_quantifier_blocks(trace_quantifiers):
+        states = [transducer.automaton.num_of_states()]
+        if (kind == "forall") != negated:
+            transducer = complement_transducer(transducer)
+            negated = not negated
+            states.append(transducer.automaton.num_of_states())
+        # remove tapes of the block (last tapes)
+        transducer = automata.remove_configuration_tape(transducer, len(trace_variables))
+        states.append(transducer.automaton.num_of_states())
+        if block_sizes != None:
+            record_block_size(block_sizes, kind + " " + ",".join(trace_variables[::-1]), max(states))
+
+    if negated:
+        transducer = complement_transducer(transducer)
+        transducer.automaton = automata.minimize(transducer)
 
     return transducer
 
-def process_existential_quantifier_on_last_tape(
-    transducer: automata.Automaton
-) -> automata.Automaton:
-    # remove last tape of the second step
-    return automata.remove_configuration_tape(transducer)
-
-def process_universal_quantifier_on_last_tape(
-    transducer: automata.Automaton
-) -> automata.Automaton:
-    # forall y . phi <=> ! exists y. ! phi 
-    # complement the transducer
-    transducer_neg = automata.Automaton(
+def complement_transducer(transducer: automata.Automaton) -> automata.Automaton:
+    return automata.Automaton(
         automata.complement(transducer),
         transducer.alphabet,
         transducer.symbol_map.copy(),
         transducer.number_of_tapes,
         transducer.atomic_propositions
     )
-    # remove y (last tape)
-    tmp = process_existential_quantifier_on_last_tape(transducer_neg)
-    # complement the result
-    result = automata.Automaton(
-        automata.complement(tmp),
-        tmp.alphabet,
-        tmp.symbol_map.copy(),
-        tmp.number_of_tapes,
-        tmp.atomic_propositions
-    )
-    result.automaton = automata.minimize(result)
 
-    return result
+def record_block_size(block_sizes: dict, name: str, states: int):
+    # name -> [calls, max states, total states]
+    if name not in block_sizes:
+        block_sizes[name] = [0, 0, 0]
+    block_sizes[name][0] += 1
+    block_sizes[name][1] = max(block_sizes[name][1], states)
+    block_sizes[name][2] += states
 
 def check_transition_invariant_condition(
     extended_transducer: automata.Automaton,
@@ -358,105 +539,74 @@ def check_transition_invariant_condition(
     relation: automata.Automaton,
     trace_quantifiers: list,
     system_transducer: automata.Automaton,
-    extended_initial: automata.Automaton
+    extended_initial: automata.Automaton,
+    artefacts: InvariantArtefacts = None,
+    context: VerificationContext = None
 ) -> bool:
+    if artefacts == None:
+        artefacts = InvariantArtefacts(invariant)
+    if context == None:
+        context = VerificationContext(
+            extended_initial = extended_initial,
+            accepting_trans = accepting_trans,
+            trace_quantifiers = trace_quantifiers,
+            system_transducer = system_transducer
+        )
+
+    # the constructions of steps 1-5 are deferred: every node is built only when
+    # the automaton is requested, its emptiness is decided on the operands
+    # (unions are split, intersections are explored on the fly)
+
     # 1) both the current and the next configuration of the transducer
     # have to be in an invariant
-    first = extend_automaton_to_transducer(invariant, 0)
-    second = extend_automaton_to_transducer(invariant, 1)
-    transducer_from_invariant = automata.Automaton(
-        automata.intersection(first, second),
-        first.alphabet,
-        first.symbol_map.copy(),
-        first.number_of_tapes,
-        first.atomic_propositions
-    )
+    if artefacts.cylindrified != None:
+        transducer_from_invariant = DeferredAutomaton(automaton = artefacts.cylindrified)
+    else:
+        transducer_from_invariant = DeferredAutomaton(
+            operation = "intersection",
+            operands = [
+                DeferredAutomaton(automaton = artefacts.get_cylindrification(0)),
+                DeferredAutomaton(automaton = artefacts.get_cylindrification(1))
+            ],
+            build = artefacts.get_cylindrified
+        )
 
     # they have to have symbol map in the same order
     # TODO
 
     # intersection
-    extended_transducer_from_invariant = automata.Automaton(
-        automata.intersection(transducer_from_invariant, extended_transducer),
-        extended_transducer.alphabet,
-        extended_transducer.symbol_map.copy(),
-        extended_transducer.number_of_tapes,
-        extended_transducer.atomic_propositions
+    extended_transducer_from_invariant = DeferredAutomaton(
+        operation = "intersection",
+        operands = [transducer_from_invariant, DeferredAutomaton(automaton = extended_transducer)]
     )
-    extended_transducer_from_invariant.automaton = automata.minimize(extended_transducer_from_invariant)
 
     # 2) union of transducer for relation < and transducer for accepting transitions
     # they have to have symbol map in the same order
     # TODO
 
     # union
-    relation_with_acc_trans = automata.Automaton(
-        automata.union(relation, accepting_trans),
-        accepting_trans.alphabet,
-        accepting_trans.symbol_map.copy(),
-        accepting_trans.number_of_tapes,
-        accepting_trans.atomic_propositions
+    relation_with_acc_trans = DeferredAutomaton(
+        operation = "union",
+        operands = [DeferredAutomaton(automaton = relation), DeferredAutomaton(automaton = accepting_trans)]
     )
-    relation_with_acc_trans.automaton = automata.minimize(relation_with_acc_trans)
 
     # 3) intersection of extended relation with extended transducer
-    transducer_with_relation = automata.Automaton(
-        automata.intersection(
-            extended_transducer_from_invariant,
-            relation_with_acc_trans
-        ),
-        relation_with_acc_trans.alphabet,
-        relation_with_acc_trans.symbol_map.copy(),
-        relation_with_acc_trans.number_of_tapes,
-        relation_with_acc_trans.atomic_propositions
+    transducer_with_relation = DeferredAutomaton(
+        operation = "intersection",
+        operands = [extended_transducer_from_invariant, relation_with_acc_trans]
     )
-    transducer_with_relation.automaton = automata.minimize(transducer_with_relation)
-
-    # 4) left side of the implication
-    # on tapes with a universal quantifier, the original transition relation
-    # of the system must hold
-    
-    # get indices of universal quantifiers
-    universal_indices = [i for i in range(len(trace_quantifiers)) if trace_quantifiers[i][0] == "forall"]
-    # create transducers where i-th tape corresponds to the transitions of the system
-    # the content of the other tapes is arbitrary
-    transducers_to_intersect = list()
-    for index in universal_indices:
-        new_transducer = create_cylindrified_system_transducer(
-            system_transducer, 
-            index,
-            transducer_with_relation
-        )
-        transducers_to_intersect.append(new_transducer)
-    # intersect the transducers
-    if len(transducers_to_intersect) > 0:
-        left_side_transducer = transducers_to_intersect[0]
-        for i in range(1, len(transducers_to_intersect)):
-            left_side_transducer = automata.Automaton(
-                automata.intersection(left_side_transducer, transducers_to_intersect[i]),
-                left_side_transducer.alphabet,
-                left_side_transducer.symbol_map.copy(),
-                left_side_transducer.number_of_tapes,
-                left_side_transducer.atomic_propositions
-            )
-        # minimize the result
-        left_side_transducer.automaton = automata.minimize(left_side_transducer)
 
+    # 4) left side of the implication (from the verification context)
+    left_side_transducer_neg = context.get_left_side_transducer_neg()
+    if left_side_transducer_neg != None:
+        if context.is_left_side_empty():
+            # negation of the left side is universal -> so is the result after quantifier projection
+            return True
         # 5) left_side_transducer => transducer_with_relation
         # union of the negation of left_side_transducer and transducer_with_relation
-        left_side_transducer_neg = automata.Automaton(
-            automata.complement(left_side_transducer),
-            left_side_transducer.alphabet,
-            left_side_transducer.symbol_map.copy(),
-            left_side_transducer.number_of_tapes,
-            left_side_transducer.atomic_propositions
-        )
-        whole_transducer_without_quantifiers = automata.Automaton(
-            automata.union(left_side_transducer_neg, transducer_with_relation),
-            left_side_transducer_neg.alphabet,
-            left_side_transducer_neg.symbol_map.copy(),
-            left_side_transducer_neg.number_of_tapes,
-            left_side_transducer_neg.atomic_propositions
+        whole_transducer_without_quantifiers = DeferredAutomaton(
+            operation = "union",
+            operands = [DeferredAutomaton(automaton = left_side_transducer_neg), transducer_with_relation]
         )
     else:
         # no universal quantifiers -> right side of the implication always holds
@@ -464,17 +614,21 @@ def check_transition_invariant_condition(
 
     # 6) quantifier projection
     # check if the result is not empty, if yes, return False
-    if whole_transducer_without_quantifiers.automaton.is_lang_empty():
+    if whole_transducer_without_quantifiers.is_empty():
         return False
+
+    # empty projection of A is included in any automaton
+    invariant_projected = artefacts.get_projected()
+    if invariant_projected.automaton.is_lang_empty():
+        return True
     
     # remove configuration tapes
-    transducer = remove_transducer_configuration_tapes(whole_transducer_without_quantifiers)
+    transducer = remove_transducer_configuration_tapes(whole_transducer_without_quantifiers.get())
     
     # process all trace quantifiers
-    final_automaton = process_all_trace_quantifiers(transducer, trace_quantifiers)
+    final_automaton = process_all_trace_quantifiers(transducer, trace_quantifiers, context.block_sizes)
 
     # 7) check if projection(A) subseteq final_automaton
-    invariant_projected = automata.remove_configuration_tape(invariant)
     is_included = mata_nfa.is_included(
         lhs = invariant_projected.automaton,
         rhs = final_automaton.automaton,
@@ -485,6 +639,45 @@ def check_transition_invariant_condition(
     else:
         return False 
     
+def create_left_side_transducer(
+    system_transducer: automata.Automaton,
+    accepting_trans: automata.Automaton,
+    trace_quantifiers: list
+) -> automata.Automaton:
+    # left side of the implication
+    # on tapes with a universal quantifier, the original transition relation
+    # of the system must hold
+    
+    # get indices of universal quantifiers
+    universal_indices = [i for i in range(len(trace_quantifiers)) if trace_quantifiers[i][0] == "forall"]
+    if len(universal_indices) == 0:
+        return None
+
+    # create transducers where i-th tape corresponds to the transitions of the system
+    # the content of the other tapes is arbitrary
+    transducers_to_intersect = list()
+    for index in universal_indices:
+        new_transducer = create_cylindrified_system_transducer(
+            system_transducer, 
+            index,
+            accepting_trans
+        )
+        transducers_to_intersect.append(new_transducer)
+    # intersect the transducers
+    left_side_transducer = transducers_to_intersect[0]
+    for i in range(1, len(transducers_to_intersect)):
+        left_side_transducer = automata.Automaton(
+            automata.intersection(left_side_transducer, transducers_to_intersect[i]),
+            left_side_transducer.alphabet,
+            left_side_transducer.symbol_map.copy(),
+            left_side_transducer.number_of_tapes,
+            left_side_transducer.atomic_propositions
+        )
+    # minimize the result
+    left_side_transducer.automaton = automata.minimize(left_side_transducer)
+
+    return left_side_transducer
+
 def check_invariant_inductiveness(
         invariant: automata.Automaton,
         extended_transducer: automata.Automaton
@@ -583,65 +776,119 @@ def is_strict_preorder(
     return transitive 
 
 def is_irreflexive(transducer: automata.Automaton) -> bool:
-    # identity
-    identity = create_identity_transducer(transducer.symbol_map.copy())
-
-    # complement of relation
-    transducer_compl = automata.Automaton(
-        automata.complement(transducer),
-        transducer.alphabet,
-        transducer.symbol_map.copy(),
-        transducer.number_of_tapes,
-        transducer.atomic_propositions
-    )
-
-    # language inclusion check 
-    is_subseteq = mata_nfa.is_included_with_cex(
-        lhs = identity.automaton,
-        rhs = transducer_compl.automaton,
-        alphabet = identity.alphabet
-    )
-
-    word = None
-    if not is_subseteq[0]:
-        counterexample = is_subseteq[1]
-        labels = counterexample.word 
-        word = identity.get_word_from_labels(labels)
-
-    # returns tuple (bool, counterexample_word)
-    return (is_subseteq[0], word) 
-
+    # (x, x) is not in the relation
+    # <=> no accepting run of the transducer over the diagonal (symbols with the same halves),
+    # the shortest word (x, x) accepted by the transducer is found by BFS
+    aut = transducer.automaton
+    diagonal = dict()
+    successors = dict()
+    for t in aut.iterate():
+        if t.symbol not in diagonal:
+            symbol = transducer.alphabet.reverse_translate_symbol(t.symbol)
+            diagonal[t.symbol] = symbol[:int(len(symbol)/2)] == symbol[int(len(symbol)/2):]
+        if diagonal[t.symbol]:
+            successors.setdefault(t.source, list()).append((t.symbol, t.target))
+
+    # BFS from the initial states (predecessors are kept to reconstruct the witness)
+    final_states = set(aut.final_states)
+    predecessors = {state: None for state in aut.initial_states}
+    queue = list(aut.initial_states)
+    for state in queue:
+        if state in final_states:
+            labels = list()
+            while predecessors[state] != None:
+                state, label = predecessors[state]
+                labels.append(label)
+            # returns tuple (bool, counterexample_word)
+            return (False, transducer.get_word_from_labels(labels[::-1]))
+        for symbol, target in successors.get(state, []):
+            if target not in predecessors:
+                predecessors[target] = (state, symbol)
+                queue.append(target)
+
+    return (True, None)
+
+def get_symbol_successors(aut: automata.Automaton) -> dict:
+    # state -> symbol (as a string) -> list of targets
+    symbols = dict()
+    successors = dict()
+    for t in aut.automaton.iterate():
+        if t.symbol not in symbols:
+            symbols[t.symbol] = aut.alphabet.reverse_translate_symbol(t.symbol)
+        successors.setdefault(t.source, dict()).setdefault(symbols[t.symbol], list()).append(t.target)
+    return successors
 
 def is_transitive(
         transducer: automata.Automaton,
         invariant: automata.Automaton
     ) -> bool:
-    # get post(invariant)
-    post_A = get_transducer_post(
-        automaton = invariant,
-        transducer = transducer
-    )
-
-    # get post(post(invariant))
-    post_post_A = get_transducer_post(
-        automaton = post_A,
-        transducer = transducer
-    )
-
-    # check language inclusion
-    is_subseteq = mata_nfa.is_included_with_cex(
-        lhs = post_post_A.automaton,
-        rhs = post_A.automaton,
-        alphabet = invariant.alphabet
-    )
-    
-    word = None
-    if not is_subseteq[0]:
-        counterexample = is_subseteq[1]
-        labels = counterexample.word 
-        word = post_post_A.get_word_from_labels(labels)
+    # post(post(A)) subseteq post(A)
+    # the composition T o T restricted to A is explored on the fly (states (a, p, q))
+    # together with the subset construction of post(A) (sets of states (a, p)),
+    # the shortest counterexample is returned as the pairs of words (xy, yz)
+    # with x in A and z not in post(A)
+    successors = get_symbol_successors(transducer)
+    invariant_successors = get_symbol_successors(invariant)
+    final_states = set(transducer.automaton.final_states)
+    invariant_final_states = set(invariant.automaton.final_states)
+
+    # transitions of T indexed by the first tape: state -> first -> second -> targets
+    split_successors = dict()
+    for p, symbol_targets in successors.items():
+        for symbol, targets in symbol_targets.items():
+            half = int(len(symbol)/2)
+            split_successors.setdefault(p, dict()).setdefault(symbol[:half], dict())[symbol[half:]] = targets
+
+    def get_post_subset(subset: frozenset, z: str) -> frozenset:
+        # states (a, p) of post(A) after reading z
+        return frozenset(
+            (next_a, next_p)
+            for a, p in subset
+            for x, invariant_targets in invariant_successors.get(a, dict()).items()
+            for next_p in split_successors.get(p, dict()).get(x, dict()).get(z, [])
+            for next_a in invariant_targets
+        )
 
-    return (is_subseteq[0], word)
+    initial_subset = frozenset(
+        (a, p) 
+        for a in invariant.automaton.initial_states 
+        for p in transducer.automaton.initial_states
+    )
+    initial = [
+        (a, p, q, initial_subset)
+        for a in invariant.automaton.initial_states
+        for p in transducer.automaton.initial_states
+        for q in transducer.automaton.initial_states
+    ]
+    predecessors = {state: None for state in initial}
+    queue = list(initial)
+    for state in queue:
+        a, p, q, subset = state
+        if a in invariant_final_states and p in final_states and q in final_states and \
+            not any(b in invariant_final_states and r in final_states for b, r in subset):
+            # z is in post(post(A)), but not in post(A)
+            xy, yz = list(), list()
+            while predecessors[state] != None:
+                state, (x, y, z) = predecessors[state]
+                xy.append(x + y)
+                yz.append(y + z)
+            return (False, (xy[::-1], yz[::-1]))
+
+        next_subsets = dict()
+        for x, invariant_targets in invariant_successors.get(a, dict()).items():
+            for y, first_targets in split_successors.get(p, dict()).get(x, dict()).items():
+                for z, second_targets in split_successors.get(q, dict()).get(y, dict()).items():
+                    if z not in next_subsets:
+                        next_subsets[z] = get_post_subset(subset, z)
+                    for next_a in invariant_targets:
+                        for next_p in first_targets:
+                            for next_q in second_targets:
+                                next_state = (next_a, next_p, next_q, next_subsets[z])
+                                if next_state not in predecessors:
+                                    predecessors[next_state] = (state, (x, y, z))
+                                    queue.append(next_state)
+
+    return (True, None)
 
 def create_identity_transducer(symbol_map: list) -> automata.Automaton:
     # new symbol map
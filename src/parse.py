@@ -1,5 +1,6 @@
 from lark import Lark, Transformer
 import argparse
+import budget
 
 class TreeToJson(Transformer):
     # remove trace_quantifiers from tree
@@ -36,8 +37,26 @@ def create_parser(grammar_file_path):
         grammar = f.read()
     return Lark(grammar, start="trace_quantifiers")
 
-def parse_command_line_arguments():
-    # parse command line arguments
+def parse_budgets(values: list, option: str, input_parser) -> dict:
+    # "stage=value" for one stage, "value" for all stages
+    budgets = dict()
+    for value in values if values != None else list():
+        stage, separator, number = value.rpartition("=")
+        stages = [stage] if separator != "" else budget.STAGES
+        if separator != "" and stage not in budget.STAGES:
+            input_parser.error(option + ": unknown stage " + stage + " (" + ", ".join(budget.STAGES) + ")")
+        try:
+            number = float(number)
+        except ValueError:
+            input_parser.error(option + ": wrong budget " + value)
+        if number <= 0:
+            input_parser.error(option + ": budget " + value + " is not positive")
+        for stage in stages:
+            budgets[stage] = number
+    return budgets
+
+def parse_command_line_arguments(arguments = None):
+    # parse command line arguments (sys.argv by default)
     input_parser = argparse.ArgumentParser()
     input_parser.add_argument(
         "--formula", 
@@ -82,6 +101,164 @@ def parse_command_line_arguments():
         help="optional bound for the transducer",
         required=False
     )
+    # SAT solver used in the CEGIS loop
+    input_parser.add_argument(
+        "--solver",
+        help="name of the pysat backend for the SAT solver",
+        default="g3",
+        required=False
+    )
+    # optional portfolio of SAT solvers
+    input_parser.add_argument(
+        "--portfolio",
+        help="run several pysat backends in parallel and take the first solution (comma-separated list of names)",
+        nargs="?",
+        const="default",
+        required=False
+    )
+    input_parser.add_argument(
+        "--portfolio_log",
+        help="optional file where the winning backend of the portfolio is recorded",
+        required=False
+    )
+    # optional pipelined CEGIS loop
+    input_parser.add_argument(
+        "--pipeline",
+        help="number of worker processes checking candidates while the SAT solver continues",
+        type=int,
+        default=0,
+        required=False
+    )
+    input_parser.add_argument(
+        "--pipeline_queue",
+        help="maximum number of candidates waiting for the workers (twice the number of workers by default)",
+        type=int,
+        required=False
+    )
+    # statistics of the candidate checks
+    input_parser.add_argument(
+        "--check_stats",
+        help="print latency and rejection rate of every candidate check at the end of the run, or save them to the given JSON file",
+        nargs="?",
+        const="-",
+        required=False
+    )
+    input_parser.add_argument(
+        "--fixed_check_order",
+        help="always run the candidate checks in the default order instead of ordering them by their measured cost",
+        action="store_true"
+    )
+    # optional determinism of the generated advice bits
+    input_parser.add_argument(
+        "--deterministic",
+        help="generate deterministic advice bits",
+        action="store_true"
+    )
+    input_parser.add_argument(
+        "--amo_encoding",
+        help="encoding of the at-most-one constraints for determinism",
+        choices=["pairwise", "seqcounter", "commander", "sortnetwrk", "cardnetwrk", "bitwise", "ladder", "totalizer"],
+        default="pairwise"
+    )
+    # optional compression of the alphabet of the advice bits
+    input_parser.add_argument(
+        "--compress_alphabet",
+        help="allocate transition variables only for classes of symbols that occur in the system",
+        action="store_true"
+    )
+    # optional cache of verdicts for equivalent candidates
+    input_parser.add_argument(
+        "--candidate_cache",
+        help="reuse verdicts of candidates whose minimal automata were already checked",
+        action="store_true"
+    )
+    # optional explicit-state falsifier
+    input_parser.add_argument(
+        "--bounded_check",
+        help="refute candidates on configurations of length at most N before the symbolic checks",
+        type=int,
+        default=0,
+        required=False
+    )
+    # disk cache of the restricted system
+    input_parser.add_argument(
+        "--cache_dir",
+        help="directory with restricted systems from previous runs",
+        required=False
+    )
+    input_parser.add_argument(
+        "--cache_size",
+        help="maximum size of the cache directory in MB",
+        type=int,
+        default=512,
+        required=False
+    )
+    # checkpoints of the search
+    input_parser.add_argument(
+        "--checkpoint",
+        help="periodically save the learned clauses and the state of the search to the given file",
+        required=False
+    )
+    input_parser.add_argument(
+        "--checkpoint_interval",
+        help="minimum number of seconds between two checkpoints",
+        type=float,
+        default=60,
+        required=False
+    )
+    input_parser.add_argument(
+        "--resume",
+        help="continue the search from --checkpoint if the file exists",
+        action="store_true"
+    )
+    # resource budgets of the stages
+    input_parser.add_argument(
+        "--time_budget",
+        help="time limits of the stages in seconds as stage=seconds (" + ", ".join(budget.STAGES) + ") or seconds for all stages",
+        nargs="+",
+        required=False
+    )
+    input_parser.add_argument(
+        "--memory_budget",
+        help="limits of the memory allocated in the stages in MB as stage=MB or MB for all stages",
+        nargs="+",
+        required=False
+    )
+    # profiling of the run
+    input_parser.add_argument(
+        "--trace",
+        help="save nested spans of the stages, SAT calls and checks as JSON lines to the given file",
+        required=False
+    )
+    input_parser.add_argument(
+        "--trace_folded",
+        help="export the spans of --trace as folded stacks for flame graphs to the given file",
+        required=False
+    )
+    input_parser.add_argument(
+        "--op_stats",
+        help="print the most expensive automata operations and their call sites at the end of the run, or save them to the given JSON file",
+        nargs="?",
+        const="-",
+        required=False
+    )
+    input_parser.add_argument(
+        "--op_stats_top",
+        help="number of operations in --op_stats",
+        type=int,
+        default=20,
+        required=False
+    )
     
-    args = vars(input_parser.parse_args())
+    args = vars(input_parser.parse_args(arguments))
+    if args["pipeline"] > 0 and args["portfolio"] != None:
+        input_parser.error("--pipeline cannot be combined with --portfolio")
+    if args["trace_folded"] != None and args["trace"] == None:
+        input_parser.error("--trace_folded requires --trace")
+    if args["checkpoint"] != None and (args["pipeline"] > 0 or args["portfolio"] != None):
+        input_parser.error("--checkpoint cannot be combined with --pipeline or --portfolio")
+    if args["resume"] and args["checkpoint"] == None:
+        input_parser.error("--resume requires --checkpoint")
+    args["time_budget"] = parse_budgets(args["time_budget"], "--time_budget", input_parser)
+    args["memory_budget"] = parse_budgets(args["memory_budget"], "--memory_budget", input_parser)
     return args
\ No newline at end of file
@@ -7,16 +7,158 @@ import libmata.nfa.nfa as mata_nfa
 from libmata import parser, alphabets, plotting
 import invariant_conditions
 from pysat.formula import *
+from pysat.card import CardEnc, EncType
+import multiprocessing
+import queue
+import os
+import signal
+import sys
+import time
+import numpy
+import hashlib
+from scheduler import CheckScheduler
+import alphabet_compression
+import bounded_falsifier
+import tracing
+import checkpoint as checkpoints
+import budget
 
-GLOBAL_VARIABLE_COUNT = 0
+# default backends for the portfolio mode
+PORTFOLIO_SOLVERS = ["cadical153", "glucose4", "maplechrono", "lingeling"]
+
+class VariablePool:
+    # allocation of SAT variables for one search (in the spirit of pysat IDPool)
+    # variables are allocated in named families with a shape, e.g.
+    # "A.transitions" with shape (src, symbol, dst)
+    def __init__(self):
+        self.top = 0
+        self.families = dict()
+
+    def allocate(self, family: str, shape: tuple) -> list:
+        if family in self.families:
+            raise ValueError("Variable family " + family + " is already allocated")
+        count = 1
+        for size in shape:
+            count *= size
+        first = self.top + 1
+        self.top += count
+        self.families[family] = (first, tuple(shape))
+        return list(range(first, first + count))
+
+    def new_variable(self, family = "auxiliary") -> int:
+        # auxiliary variables are allocated one by one
+        self.top += 1
+        if family not in self.families:
+            self.families[family] = (None, list())
+        self.families[family][1].append(self.top)
+        return self.top
+
+    def new_variables(self, family: str, count: int) -> list:
+        return [self.new_variable(family) for _ in range(count)]
+
+    def id(self, family: str, index: tuple) -> int:
+        first, shape = self.families[family]
+        offset = 0
+        for i, size in zip(index, shape):
+            if i < 0 or i >= size:
+                raise IndexError("Index " + str(index) + " out of bounds for " + family)
+            offset = offset * size + i
+        return first + offset
+
+    def get_blocking_clause(self, model: list) -> list:
+        # negation of the values of all variables in families with a shape
+        # (auxiliary variables are not blocked, the same automata would be found again)
+        clause = list()
+        for family, (first, shape) in self.families.items():
+            if first == None:
+                continue
+            count = 1
+            for size in shape:
+                count *= size
+            clause += [-literal for literal in model[first-1:first-1+count]]
+        return clause
+
+    def get_state(self, top = None) -> dict:
+        # JSON-serializable state (for checkpoints),
+        # auxiliary variables above the given top are left out
+        top = self.top if top == None else top
+        families = dict()
+        for family, (first, shape) in self.families.items():
+            if first == None:
+                families[family] = [None, [variable for variable in shape if variable <= top]]
+            else:
+                families[family] = [first, list(shape)]
+        return {"top": top, "families": families}
+
+    def set_state(self, state: dict):
+        self.top = state["top"]
+        self.families = {
+            family: (first, tuple(shape) if first != None else list(shape))
+            for family, (first, shape) in state["families"].items()
+        }
+
+    def decode(self, variable: int) -> tuple:
+        # returns (family, index) of the variable
+        variable = abs(variable)
+        for family, (first, shape) in self.families.items():
+            if first == None:
+                if variable in shape:
+                    return (family, (shape.index(variable),))
+                continue
+            count = 1
+            for size in shape:
+                count *= size
+            if first <= variable < first + count:
+                offset = variable - first
+                index = list()
+                for size in reversed(shape):
+                    index.append(offset % size)
+                    offset //= size
+                return (family, tuple(reversed(index)))
+        raise KeyError("Variable " + str(variable) + " was not allocated")
 
 class Invariant:
-    def __init__(self, num_states):
+    def __init__(self, num_states, pool: VariablePool, name: str):
         self.num_states = num_states
+        self.pool = pool
+        self.name = name
         self.trans_variables = list()
         self.state_variables = list()
         self.used_alphabet = list()
         self.auxiliary_variables = list()
+        # classes of symbols sharing the same transition variables
+        # (one class for each symbol without alphabet compression)
+        self.symbol_classes = list()
+        self.symbol_index = dict()
+        # alphabet of the decoded automata
+        self.alphabet = None
+        self.symbol_codes = list()
+
+    def set_alphabet(self, symbols: list):
+        self.set_symbol_classes([[symbol] for symbol in symbols])
+
+    def set_symbol_classes(self, symbol_classes: list):
+        # transition variables are allocated for each class, 
+        # the first symbol represents the class
+        self.symbol_classes = symbol_classes
+        self.used_alphabet = [symbol_class[0] for symbol_class in symbol_classes]
+        self.symbol_index = {
+            symbol: index 
+            for index, symbol_class in enumerate(symbol_classes) 
+            for symbol in symbol_class
+        }
+
+    def transitions_family(self) -> str:
+        return self.name + ".transitions"
+
+    def states_family(self) -> str:
+        return self.name + ".states"
+
+    def transition_variable(self, src_index: int, symbol_index: int, dst_index: int) -> int:
+        return self.pool.id(self.transitions_family(), (src_index, symbol_index, dst_index))
+
+    def state_variable(self, state_index: int) -> int:
+        return self.pool.id(self.states_family(), (state_index,))
 
 def get_all_words_from_projected_word(word: list, conf_variables: int):
     all_words = list()
@@ -32,44 +174,87 @@ def get_all_words_from_projected_word(word: list, conf_variables: int):
 
     return all_words 
 
-def generate_condition_for_determinism(
-        inv: Invariant,
-        solver: Solver
-    ):
-    global GLOBAL_VARIABLE_COUNT
+# at-most-one encodings from pysat.card (commander encoding is not available there)
+AMO_ENCODINGS = {
+    "pairwise": EncType.pairwise,
+    "seqcounter": EncType.seqcounter,
+    "sortnetwrk": EncType.sortnetwrk,
+    "cardnetwrk": EncType.cardnetwrk,
+    "bitwise": EncType.bitwise,
+    "ladder": EncType.ladder,
+    "totalizer": EncType.totalizer,
+    "commander": None
+}
 
-    # TODO
-    #if inv.num_states < 2:
-    #    return 
+def get_commander_clauses(
+        variables: list,
+        pool: VariablePool,
+        family: str,
+        group_size = 3
+    ) -> list:
+    # commander encoding of at most one variable (Klieber & Kwon)
+    if len(variables) <= group_size + 1:
+        return [[-x, -y] for x, y in itertools.combinations(variables, 2)]
 
-    # create transition variables
-    # src+symbol+dst ordered alphabetically
-    inv.trans_variables = list(range(1+GLOBAL_VARIABLE_COUNT, 1+GLOBAL_VARIABLE_COUNT+inv.num_states*inv.num_states*len(inv.used_alphabet)))
-    GLOBAL_VARIABLE_COUNT += len(inv.trans_variables)
+    clauses = list()
+    commanders = list()
+    for i in range(0, len(variables), group_size):
+        group = variables[i:i+group_size]
+        commander = pool.new_variable(family)
+        commanders.append(commander)
+        # at most one variable in the group
+        clauses += [[-x, -y] for x, y in itertools.combinations(group, 2)]
+        # variable in the group -> its commander
+        clauses += [[commander, -x] for x in group]
+        # commander -> some variable in the group
+        clauses.append([-commander] + group)
+    # at most one commander
+    return clauses + get_commander_clauses(commanders, pool, family, group_size)
 
-    # k possible targets for each state and symbol
-    # -> math.comb(k, 2) clauses for each state and symbol
-    for index_src in inv.trans_variables.copy()[::inv.num_states*len(inv.used_alphabet)]: 
+def generate_condition_for_determinism(
+        inv: Invariant,
+        solver: Solver,
+        encoding = "pairwise"
+    ) -> tuple:
+    # at most one target for each state and symbol
+    # returns number of clauses and auxiliary variables of the encoding
+    family = inv.name + ".determinism"
+    top = inv.pool.top
+    number_of_clauses = 0
+    for index_src in range(inv.num_states): 
         # every new source state
         for index_symbol in range(len(inv.used_alphabet)):
-            all_variables = [index_src + index_symbol + j for j in range(inv.num_states)]
-            # generate all clauses
-            all_options = list(itertools.product(all_variables, repeat=2))
-            for option in all_options:
-                if option[0] != option[1]:
-                    solver.add_clause([-(option[0]), -(option[1])])
+            all_variables = [inv.transition_variable(index_src, index_symbol, j) for j in range(inv.num_states)]
+            if encoding == "commander":
+                clauses = get_commander_clauses(all_variables, inv.pool, family)
+            else:
+                cnf = CardEnc.atmost(
+                    lits = all_variables, 
+                    bound = 1, 
+                    top_id = inv.pool.top, 
+                    encoding = AMO_ENCODINGS[encoding]
+                )
+                # auxiliary variables of the encoding are above top
+                if cnf.nv > inv.pool.top:
+                    inv.pool.new_variables(family, cnf.nv - inv.pool.top)
+                clauses = cnf.clauses
+            for clause in clauses:
+                solver.add_clause(clause)
+            number_of_clauses += len(clauses)
+
+    return number_of_clauses, inv.pool.top - top
 
 def generate_condition_for_automaton(
         inv: Invariant,
         solver: Solver,
         transducer = False 
     ):
-    global GLOBAL_VARIABLE_COUNT
-
     # create transition variables
     # src+symbol+dst ordered alphabetically
-    inv.trans_variables = list(range(1+GLOBAL_VARIABLE_COUNT, 1+GLOBAL_VARIABLE_COUNT+inv.num_states*inv.num_states*len(inv.used_alphabet)))
-    GLOBAL_VARIABLE_COUNT += len(inv.trans_variables)
+    inv.trans_variables = inv.pool.allocate(
+        inv.transitions_family(), 
+        (inv.num_states, len(inv.used_alphabet), inv.num_states)
+    )
 
     # simple condition for at least one transition
     if not transducer: 
@@ -83,12 +268,10 @@ def generate_condition_for_completeness(
         inv: Invariant,
         solver: Solver
     ):
-    global GLOBAL_VARIABLE_COUNT
-
-    for index_src in inv.trans_variables.copy()[::inv.num_states*len(inv.used_alphabet)]: 
+    for index_src in range(inv.num_states): 
         # every new source state
         for index_symbol in range(len(inv.used_alphabet)):
-            all_variables = [index_src + index_symbol + j for j in range(inv.num_states)]
+            all_variables = [inv.transition_variable(index_src, index_symbol, j) for j in range(inv.num_states)]
             # generate all clauses
             solver.add_clause(all_variables)
 
@@ -97,10 +280,7 @@ def generate_condition_for_accepting_states(
         solver: Solver,
         transducer = False 
     ):
-    global GLOBAL_VARIABLE_COUNT
-
-    inv.state_variables = list(range(1+GLOBAL_VARIABLE_COUNT, 1+GLOBAL_VARIABLE_COUNT+inv.num_states))
-    GLOBAL_VARIABLE_COUNT += len(inv.state_variables)
+    inv.state_variables = inv.pool.allocate(inv.states_family(), (inv.num_states,))
 
     # at least one accepting state
     if not transducer:
@@ -115,13 +295,14 @@ def find_transitions(
         symbol: str, 
         invariant: Invariant
     ) -> list:
-    trans_variables = invariant.trans_variables 
     transitions = list()
-    symbol_index = invariant.used_alphabet.index(symbol)
+    if symbol not in invariant.symbol_index:
+        # symbol outside of the (compressed) alphabet
+        return transitions
+    symbol_index = invariant.symbol_index[symbol]
     
     for k in range(invariant.num_states):
-        t = trans_variables[src_index*len(invariant.used_alphabet)*invariant.num_states + symbol_index*invariant.num_states + k]
-        transitions.append(t)
+        transitions.append(invariant.transition_variable(src_index, symbol_index, k))
 
     return transitions
 
@@ -129,9 +310,9 @@ def get_src_from_variable(
         invariant: Invariant,
         variable: int,
     ) -> int :
-        # one src is for num_symbols * num_states transitions
-        # TODO
-        return int((variable-invariant.trans_variables[0]) / (len(invariant.used_alphabet) * invariant.num_states))
+        # source state of the next transition is the target of the transition variable
+        family, (src_index, symbol_index, dst_index) = invariant.pool.decode(variable)
+        return dst_index
 
 def add_words_to_be_accepted(
         words: list,
@@ -139,42 +320,19 @@ def add_words_to_be_accepted(
         invariant: Invariant
     ):
     # at least one os the word in words should be accepted 
-    global GLOBAL_VARIABLE_COUNT
-    
+    # (one conjunction of variables for each run over each word)
     all_dnf_clauses = list()
     for word in words: 
-        dnf_clauses = [[] for _ in range(invariant.num_states**(len(word)))] # N^(l-1) clauses
-
-        for index, symbol in enumerate(word):
-            number_of_repetitions = invariant.num_states ** (len(word)-1-index)
-
-            clause_index = 0
-            while clause_index < len(dnf_clauses):
-                if index == 0:
-                    src_index = 0
-                else:
-                    src_index = get_src_from_variable(invariant, dnf_clauses[clause_index][-1])
-                transitions = find_transitions(src_index, symbol, invariant)
-                for t in transitions:
-                    for _ in range(number_of_repetitions):
-                        dnf_clauses[clause_index].append(t)
-                        clause_index += 1
-        # add accepting state
-        clause_index = 0
-        while clause_index < len(dnf_clauses):
-            for state in invariant.state_variables:
-                dnf_clauses[clause_index].append(state)
-                clause_index += 1
-        all_dnf_clauses += dnf_clauses 
+        all_dnf_clauses += get_accepting_paths(word, invariant)
 
     # Tseytin transformation into CNF
     # new name for each clause 
-    for clause in dnf_clauses:
-        GLOBAL_VARIABLE_COUNT += 1
-        invariant.auxiliary_variables.append(GLOBAL_VARIABLE_COUNT)
+    for clause in all_dnf_clauses:
+        auxiliary_variable = invariant.pool.new_variable()
+        invariant.auxiliary_variables.append(auxiliary_variable)
         # add new clauses to SAT solver
         for var in clause:
-            solver.add_clause([var, -GLOBAL_VARIABLE_COUNT])
+            solver.add_clause([var, -auxiliary_variable])
     # add final clause to SAT solver
     solver.add_clause([aux_var for aux_var in invariant.auxiliary_variables])
     invariant.auxiliary_variables = list()
@@ -184,7 +342,9 @@ def add_word_to_be_rejected(
     solver: Solver,
     relation: automata.Automaton
 ):
-    global GLOBAL_VARIABLE_COUNT
+    if any(symbol not in relation.symbol_index for symbol in word):
+        # symbol outside of the (compressed) alphabet -> the word is always rejected
+        return 
 
     cnf_clauses = [[] for _ in range(relation.num_states**(len(word)))] # N^(l-1) clauses
 
@@ -199,7 +359,7 @@ def add_word_to_be_rejected(
             if index == 0:
                 src_index = 0
             else:
-                src_index = get_src_from_variable(relation, cnf_clauses[clause_index][-1])
+                src_index = get_src_from_variable(relation, -cnf_clauses[clause_index][-1])
             transitions = find_transitions(src_index, symbol, relation)
             for t in transitions:
                 for _ in range(number_of_repetitions):
@@ -218,6 +378,119 @@ def add_word_to_be_rejected(
         solver.add_clause(clause)
 
 
+def get_accepting_paths(
+        word: list,
+        invariant: Invariant
+    ) -> list:
+    # all runs over the word (transition variables and the variable of the last state)
+    if any(symbol not in invariant.symbol_index for symbol in word):
+        # symbol outside of the (compressed) alphabet -> no run
+        return list()
+    paths = [([], 0)]
+    for symbol in word:
+        symbol_index = invariant.symbol_index[symbol]
+        paths = [
+            (path + [invariant.transition_variable(src_index, symbol_index, dst_index)], dst_index)
+            for path, src_index in paths
+            for dst_index in range(invariant.num_states)
+        ]
+    return [path + [invariant.state_variable(dst_index)] for path, dst_index in paths]
+
+def get_rejection_literal(
+        word: list,
+        solver: Solver,
+        invariant: Invariant
+    ):
+    # the returned literal implies that the word is rejected
+    # (None if the word is always rejected)
+    paths = get_accepting_paths(word, invariant)
+    if len(paths) == 0:
+        return None
+    auxiliary_variable = invariant.pool.new_variable()
+    for path in paths:
+        solver.add_clause([-auxiliary_variable] + [-var for var in path])
+    return auxiliary_variable
+
+def get_conjunction_literal(
+        literals: list,
+        solver: Solver,
+        pool: VariablePool
+    ) -> int:
+    # the returned literal implies all literals
+    auxiliary_variable = pool.new_variable()
+    for literal in literals:
+        solver.add_clause([literal, -auxiliary_variable])
+    return auxiliary_variable
+
+def get_image_literal(
+        word: list,
+        solver: Solver,
+        A: Invariant,
+        T: Invariant
+    ) -> int:
+    # the returned literal implies that the word is in post(A)
+    # (some x accepted by A with (x, word) accepted by T),
+    # pairs of states (A, T) reachable over the prefixes of the word get auxiliary variables
+    reachable = {(0, 0): []}
+    for symbol in word:
+        # next pair of states -> conjunctions of literals leading to it
+        disjuncts = dict()
+        for (a, p), literals in reachable.items():
+            indices = set()
+            for x, a_index in A.symbol_index.items():
+                if x + symbol not in T.symbol_index:
+                    continue
+                indices.add((a_index, T.symbol_index[x + symbol]))
+            for a_index, t_index in indices:
+                for next_a in range(A.num_states):
+                    for next_p in range(T.num_states):
+                        disjuncts.setdefault((next_a, next_p), list()).append(literals + [
+                            A.transition_variable(a, a_index, next_a),
+                            T.transition_variable(p, t_index, next_p)
+                        ])
+        reachable = dict()
+        for state, conjunctions in disjuncts.items():
+            auxiliary_variable = A.pool.new_variable()
+            solver.add_clause([-auxiliary_variable] + [
+                get_conjunction_literal(conjunction, solver, A.pool) for conjunction in conjunctions
+            ])
+            reachable[state] = [auxiliary_variable]
+
+    auxiliary_variable = A.pool.new_variable()
+    solver.add_clause([-auxiliary_variable] + [
+        get_conjunction_literal(literals + [A.state_variable(a), T.state_variable(p)], solver, A.pool)
+        for (a, p), literals in reachable.items()
+    ])
+    return auxiliary_variable
+
+def add_transitivity_constraint(
+        counterexample: tuple,
+        solver: Solver,
+        A: Invariant,
+        T: Invariant
+    ):
+    # x in A and (x, y), (y, z) in T => z in post(A)
+    xy, yz = counterexample
+    x = [symbol[:int(len(symbol)/2)] for symbol in xy]
+    z = [symbol[int(len(symbol)/2):] for symbol in yz]
+    clause = list()
+    for word, invariant in [(x, A), (xy, T), (yz, T)]:
+        literal = get_rejection_literal(word, solver, invariant)
+        if literal == None:
+            # the constraint always holds
+            return
+        clause.append(literal)
+    clause.append(get_image_literal(z, solver, A, T))
+    solver.add_clause(clause)
+
+def report_determinism_encoding(inv: Invariant, size: tuple, encoding: str):
+    number_of_clauses, number_of_variables = size
+    print(
+        "Determinism of", inv.name, "(" + encoding + "):", 
+        number_of_clauses, "clauses,", 
+        number_of_variables, "auxiliary variables"
+    )
+
 def find_solution(
         k_aut: int,
         restricted_initial_conf: automata.Automaton,
@@ -227,27 +500,88 @@ def find_solution(
         trace_quantifiers: list,
         T_aut,
         A_aut,
-        relation_bound  
+        relation_bound,
+        solver_name = 'g3',
+        show_progress = True,
+        pipeline_workers = 0,
+        pipeline_queue = None,
+        check_stats = None,
+        fixed_check_order = False,
+        deterministic = False,
+        amo_encoding = "pairwise",
+        compress_alphabet = False,
+        candidate_cache = False,
+        bounded_check = 0,
+        checkpoint = None,
+        checkpoint_interval = 60,
+        resume = False
     ):
-    global GLOBAL_VARIABLE_COUNT
     relation_given = (T_aut != None) 
     invariant_given = (A_aut != None)
     
-    GLOBAL_VARIABLE_COUNT = 0
     # solver setup
-    solver = Solver(name='g3')
+    solver = Solver(name=solver_name)
+    resumed = None
+    if checkpoint != None:
+        # clauses of the search are recorded for the checkpoints
+        solver = checkpoints.RecordingSolver(solver)
+        problem = checkpoints.get_problem(
+            dict(
+                k_aut = k_aut,
+                relation_bound = relation_bound,
+                deterministic = deterministic,
+                amo_encoding = amo_encoding,
+                compress_alphabet = compress_alphabet,
+                invariant_given = invariant_given,
+                relation_given = relation_given
+            ),
+            dict(
+                restricted_initial_conf = restricted_initial_conf,
+                restricted_transducer = restricted_transducer,
+                accepting_transitions = accepting_transitions,
+                A_aut = A_aut,
+                T_aut = T_aut
+            )
+        )
+        if resume and os.path.exists(checkpoint):
+            resumed = checkpoints.load_checkpoint(checkpoint, problem)
+    # SAT variables of this search
+    pool = VariablePool()
     # advice bits bound on states
-    A = Invariant(k_aut)
-    T = Invariant(k_aut if relation_bound == None else int(relation_bound))
+    A = Invariant(k_aut, pool, "A")
+    T = Invariant(k_aut if relation_bound == None else int(relation_bound), pool, "T")
 
-    # only symbols used on first tape of the transducer are in the alphabet
-    A.used_alphabet = restricted_transducer.get_all_symbols_from_first_tape()
-    T.used_alphabet = restricted_transducer.get_all_symbols()
+    if compress_alphabet:
+        # only symbols that occur in the system, one variable for each class of symbols
+        symbol_classes = alphabet_compression.compute_symbol_classes(
+            restricted_initial_conf,
+            restricted_transducer,
+            accepting_transitions
+        )
+        A.set_symbol_classes(symbol_classes)
+        T.set_symbol_classes(alphabet_compression.get_pair_classes(symbol_classes))
+        print(
+            "Compressed alphabet:", 
+            len(restricted_transducer.get_all_symbols_from_first_tape()), "symbols ->",
+            sum(len(symbol_class) for symbol_class in symbol_classes), "used symbols in",
+            len(symbol_classes), "classes"
+        )
+    else:
+        # only symbols used on first tape of the transducer are in the alphabet
+        A.set_alphabet(restricted_transducer.get_all_symbols_from_first_tape())
+        T.set_alphabet(restricted_transducer.get_all_symbols())
+    if resumed != None:
+        # variables of the saved clauses are allocated in the same order
+        checkpoints.restore_symbol_classes(A, resumed["symbol_classes"]["A"])
+        checkpoints.restore_symbol_classes(T, resumed["symbol_classes"]["T"])
 
     if not invariant_given:
         # generate conditions for invariant
         # 1) automaton
         generate_condition_for_automaton(A, solver)
+        # 2) determinism
+        if deterministic:
+            report_determinism_encoding(A, generate_condition_for_determinism(A, solver, amo_encoding), amo_encoding)
         # 3) at least one accepting state
         generate_condition_for_accepting_states(A, solver)
         # 4) symmetry breaking
@@ -257,125 +591,812 @@ def find_solution(
         # generate conditions for relation
         # 1) automaton
         generate_condition_for_automaton(T, solver, True)
+        # 2) determinism
+        if deterministic:
+            report_determinism_encoding(T, generate_condition_for_determinism(T, solver, amo_encoding), amo_encoding)
         # 3) at least one accepting state
         generate_condition_for_accepting_states(T, solver, True)
         # 4) symmetry breaking
         # TODO
 
-    # solve
-    solver.solve()
-
-    iterations = 0
-    for model in solver.enum_models():
-        iterations += 1
-        print("Iteration", iterations, end="\r", flush=True)
+    # candidate checks share the same system and formula
+    conditions = dict(
+        restricted_initial_conf = restricted_initial_conf,
+        restricted_transducer = restricted_transducer,
+        original_transducer = original_transducer,
+        accepting_transitions = accepting_transitions,
+        trace_quantifiers = trace_quantifiers,
+        # artefacts of the current invariant
+        invariant_memo = InvariantMemo()
+    )
 
-        # convert to automaton instance
-        if not invariant_given:
-            A_aut = convert_model_to_automaton(
-                model = model, 
-                inv = A, 
-                symbol_map = restricted_initial_conf.symbol_map.copy()
-            )
-        if not relation_given:
-            T_aut = convert_model_to_automaton(
-                model = model,
-                inv = T, 
-                symbol_map = restricted_transducer.symbol_map.copy()
+    # cheap refutation of candidates on small instances
+    # (also the fallback of the checks that exceed their budget, built once outside of it)
+    falsifier_bound = bounded_check
+    if falsifier_bound == 0 and budget.is_limited("check"):
+        falsifier_bound = FALLBACK_BOUND
+    if falsifier_bound > 0:
+        start = time.perf_counter()
+        with tracing.span("bounded_falsifier", [restricted_initial_conf, restricted_transducer], bound=falsifier_bound):
+            conditions["bounded_falsifier"] = bounded_falsifier.BoundedFalsifier(
+                restricted_initial_conf = restricted_initial_conf,
+                restricted_transducer = restricted_transducer,
+                bound = falsifier_bound
             )
-            
-        # check conditions
-        # 1) inclusion of initial configurations
-        initial_condition_holds = invariant_conditions.check_initial_invariant_condition(
-            extended_initial_aut = restricted_initial_conf,
-            invariant = A_aut
-        )
-        if not initial_condition_holds[0]:
-            if invariant_given:
-                print("Given invariant does not contain initial configurations")
-                sys.exit()
-            if len(model) > 15:
-                # in order to prevent explosion of variables 
-                continue 
-            word  = initial_condition_holds[1]
-            # this PROJECTED word should be accepted
-            total_symbols = sum([len(map) for map in restricted_initial_conf.symbol_map.copy()])
-            conf_variables = total_symbols - len(word[0])
-            words = get_all_words_from_projected_word(word, conf_variables)
-            add_words_to_be_accepted(words, solver, A)
-            continue
-            
-        # 2) inductiveness
-        # TODO
-        #is_inductive = invariant_conditions.check_invariant_inductiveness(
-        #    invariant = A_aut,
-        #    extended_transducer = restricted_transducer
-        #)
-        #if not is_inductive[0]:
-        #    if invariant_given:
-        #        print("Given invariant is not inductive")
-        #        sys.exit()
-        #    continue
-            
-        # check conditions for relation
-        # 1) strict preorder (irreflexivity & transitivity)
-        is_irreflexive = invariant_conditions.is_irreflexive(T_aut)
-        if not is_irreflexive[0]:
-            word = is_irreflexive[1]
-            # this word should be rejected 
-            if not relation_given:
-                add_word_to_be_rejected(word, solver, T)
-            else:
-                print("Given relation is not irreflexive")
-                sys.exit()
-            continue
-        is_transitive = invariant_conditions.is_transitive(T_aut, A_aut)
-        if not is_transitive[0]:
-            if relation_given and invariant_given:
-                print("Given relation is not transitive")
-                sys.exit()
-            continue  
-        # 1.5) check backwards reachability
-        backwards_reachability_holds = invariant_conditions.check_invariant_backwards_reachability(
-            invariant = A_aut,
-            extended_initial_aut = restricted_initial_conf,
-            relation = T_aut,
-            extended_transducer = restricted_transducer
-        )
-        if not backwards_reachability_holds[0]:
-            if relation_given and invariant_given:
-                print("Backwards reachability does not hold")
-                sys.exit()
-            continue
-        # 2) trace quantifier condition
-        transition_condition_holds = invariant_conditions.check_transition_invariant_condition(
-            extended_transducer = restricted_transducer,
+
+    # adaptive order of the checks (bounded checks first during warmup)
+    scheduler = CheckScheduler(
+        check_names = (list(BOUNDED_CHECKS.keys()) if bounded_check > 0 else []) + list(CANDIDATE_CHECKS.keys()),
+        adaptive = not fixed_check_order
+    )
+    if falsifier_bound > 0:
+        scheduler.record_phase("bounded_falsifier", time.perf_counter() - start)
+
+    # candidate-independent artefacts are built once (before the workers are started)
+    start = time.perf_counter()
+    with tracing.span("verification_context", [restricted_initial_conf, accepting_transitions]):
+        conditions["verification_context"] = invariant_conditions.VerificationContext(
+            extended_initial = restricted_initial_conf,
             accepting_trans = accepting_transitions,
-            invariant = A_aut,
-            relation = T_aut,
             trace_quantifiers = trace_quantifiers,
-            system_transducer = original_transducer,
-            extended_initial = restricted_initial_conf,
+            system_transducer = original_transducer
+        ).precompute()
+    scheduler.record_phase("verification_context", time.perf_counter() - start)
+    # optional cache of verdicts for candidates with the same languages
+    cache = CandidateCache() if candidate_cache else None
+
+    if pipeline_workers > 0:
+        # candidates are checked by a pool of worker processes
+        try:
+            result = find_solution_pipelined(
+                solver = solver,
+                A = A,
+                T = T,
+                A_aut = A_aut,
+                T_aut = T_aut,
+                conditions = conditions,
+                scheduler = scheduler,
+                use_cache = candidate_cache,
+                workers = pipeline_workers,
+                queue_size = pipeline_queue if pipeline_queue != None else 2 * pipeline_workers,
+                show_progress = show_progress
+            )
+            report_unverified_candidates(scheduler, result)
+        finally:
+            # also when the search is stopped (budget, signal)
+            report_check_statistics(scheduler, check_stats)
+        return result
+
+    iterations = 0
+    checkpoint_state = None
+    if checkpoint != None:
+        checkpoint_state = checkpoints.Checkpoint(checkpoint, checkpoint_interval, problem)
+        checkpoint_state.start(pool, solver, {"A": A.symbol_classes, "T": T.symbol_classes})
+        if resumed != None:
+            iterations = checkpoints.restore(resumed, pool, solver)
+            checkpoint_state.update(pool, solver, iterations)
+            print("Resumed from", checkpoint, "after", iterations, "iterations with", len(resumed["clauses"]), "clauses")
+    try:
+        result = find_solution_sequential(
+            solver = solver,
+            pool = pool,
+            A = A,
+            T = T,
+            A_aut = A_aut,
+            T_aut = T_aut,
+            conditions = conditions,
+            scheduler = scheduler,
+            cache = cache,
+            iterations = iterations,
+            checkpoint = checkpoint_state,
+            show_progress = show_progress
         )
-        if transition_condition_holds:
-            return A_aut, T_aut
-        elif invariant_given and relation_given:
-            print("Transition condition does not hold")
-            sys.exit()
-                
+        report_unverified_candidates(scheduler, result)
+    except (KeyboardInterrupt, SystemExit, budget.BudgetExceeded):
+        # the run was stopped -> last finished iteration is saved
+        if checkpoint_state != None:
+            checkpoint_state.save(pool, solver)
+        raise
+    finally:
+        if checkpoint_state != None:
+            checkpoint_state.stop()
+        # also when the search is stopped (budget, signal)
+        report_check_statistics(scheduler, check_stats)
+    return result
+
+def find_solution_sequential(
+        solver: Solver,
+        pool: VariablePool,
+        A: Invariant,
+        T: Invariant,
+        A_aut,
+        T_aut,
+        conditions: dict,
+        scheduler: CheckScheduler,
+        cache,
+        iterations: int,
+        checkpoint = None,
+        show_progress = True
+    ):
+    invariant_given = (A_aut != None)
+    relation_given = (T_aut != None)
+    restricted_initial_conf = conditions["restricted_initial_conf"]
+    try:
+        while solve(solver):
+            # safe point -> an exceeded budget of the search is raised here
+            budget.check()
+            model = solver.get_model()
+            # block the candidate
+            blocking_clause = pool.get_blocking_clause(model)
+            if len(blocking_clause) > 0:
+                solver.add_clause(blocking_clause)
+            iterations += 1
+            tracing.next_iteration()
+            if show_progress:
+                print("Iteration", iterations, end="\r", flush=True)
+
+            # convert to automaton instance
+            start = time.perf_counter()
+            with tracing.operation_span("decode_model") as span:
+                A_aut, T_aut = decode_model(model, A, T, A_aut if invariant_given else None, T_aut if relation_given else None, conditions)
+                span.set_outputs([A_aut, T_aut])
+            scheduler.record_phase("convert_model_to_automaton", time.perf_counter() - start)
+            
+            # check conditions (cheapest expected cost per rejection first)
+            failed_check, counterexample, timings = check_candidate(A_aut, T_aut, conditions, scheduler.order(), cache)
+            for timing in timings:
+                scheduler.record(*timing)
+            if failed_check == UNVERIFIED:
+                scheduler.record_count("unverified_candidates")
+            if failed_check == None:
+                return A_aut, T_aut
+            record_counterexample(scheduler, failed_check, counterexample)
+            with tracing.operation_span("learn " + failed_check):
+                learn_from_failed_check(
+                    failed_check = failed_check,
+                    counterexample = counterexample,
+                    solver = solver,
+                    A = A,
+                    T = T,
+                    restricted_initial_conf = restricted_initial_conf,
+                    invariant_given = invariant_given,
+                    relation_given = relation_given
+                )
+            if checkpoint != None:
+                checkpoint.update(pool, solver, iterations)
+            if len(blocking_clause) == 0:
+                # both automata are given -> the only candidate
+                break
+    finally:
+        # also when the search is stopped (budget, signal)
+        record_solver_statistics(scheduler, solver, iterations)
+        record_cache_statistics(scheduler, cache, conditions["invariant_memo"], conditions["verification_context"])
     solver.delete()
 
     # no advice bits were found for k_max
     return None, None 
 
+class InvariantMemo:
+    # artefacts of the last decoded invariant
+    # (successive models often change only the relation)
+    def __init__(self):
+        self.key = None
+        self.invariant = None
+        self.artefacts = None
+        self.lookups = 0
+        self.hits = 0
+
+    def lookup(self, key):
+        self.lookups += 1
+        if self.key != None and key == self.key:
+            self.hits += 1
+            return self.invariant
+        return None
+
+    def store(self, key, invariant: automata.Automaton):
+        # artefacts of the previous invariant are evicted
+        self.key = key
+        self.invariant = invariant
+        self.artefacts = invariant_conditions.InvariantArtefacts(invariant)
+
+def get_invariant_artefacts(A_aut, conditions: dict):
+    memo = conditions.get("invariant_memo")
+    if memo == None or memo.invariant is not A_aut:
+        return None
+    return memo.artefacts
+
+def check_initial_condition(A_aut, T_aut, conditions: dict) -> tuple:
+    # inclusion of initial configurations
+    return invariant_conditions.check_initial_invariant_condition(
+        extended_initial_aut = conditions["restricted_initial_conf"],
+        invariant = A_aut,
+        artefacts = get_invariant_artefacts(A_aut, conditions),
+        context = conditions.get("verification_context")
+    )
+
+def check_irreflexivity(A_aut, T_aut, conditions: dict) -> tuple:
+    return invariant_conditions.is_irreflexive(T_aut)
+
+def check_transitivity(A_aut, T_aut, conditions: dict) -> tuple:
+    return invariant_conditions.is_transitive(T_aut, A_aut)
+
+def check_backwards_reachability(A_aut, T_aut, conditions: dict) -> tuple:
+    return invariant_conditions.check_invariant_backwards_reachability(
+        invariant = A_aut,
+        extended_initial_aut = conditions["restricted_initial_conf"],
+        relation = T_aut,
+        extended_transducer = conditions["restricted_transducer"],
+        artefacts = get_invariant_artefacts(A_aut, conditions),
+        context = conditions.get("verification_context")
+    )
+
+def check_transition_condition(A_aut, T_aut, conditions: dict) -> tuple:
+    # trace quantifier condition
+    transition_condition_holds = invariant_conditions.check_transition_invariant_condition(
+        extended_transducer = conditions["restricted_transducer"],
+        accepting_trans = conditions["accepting_transitions"],
+        invariant = A_aut,
+        relation = T_aut,
+        trace_quantifiers = conditions["trace_quantifiers"],
+        system_transducer = conditions["original_transducer"],
+        extended_initial = conditions["restricted_initial_conf"],
+        artefacts = get_invariant_artefacts(A_aut, conditions),
+        context = conditions.get("verification_context")
+    )
+    return (transition_condition_holds, None)
+
+# all checks of a candidate (A, T) in the default order
+CANDIDATE_CHECKS = {
+    "initial": check_initial_condition,
+    "irreflexivity": check_irreflexivity,
+    "transitivity": check_transitivity,
+    "backwards_reachability": check_backwards_reachability,
+    "transition": check_transition_condition
+}
+
+def check_bounded_initial(A_aut, T_aut, conditions: dict) -> tuple:
+    # projected initial configurations of length at most the bound
+    artefacts = get_invariant_artefacts(A_aut, conditions)
+    if artefacts == None:
+        artefacts = invariant_conditions.InvariantArtefacts(A_aut)
+    return conditions["bounded_falsifier"].check_initial(artefacts.get_projected())
+
+def check_bounded_irreflexivity(A_aut, T_aut, conditions: dict) -> tuple:
+    # (x, x) for reachable configurations x of length at most the bound
+    return conditions["bounded_falsifier"].check_irreflexivity(T_aut)
+
+# explicit-state checks (counterexamples are learned as for the symbolic checks)
+BOUNDED_CHECKS = {
+    "bounded_initial": check_bounded_initial,
+    "bounded_irreflexivity": check_bounded_irreflexivity
+}
+LEARNED_AS = {
+    "bounded_initial": "initial",
+    "bounded_irreflexivity": "irreflexivity"
+}
+# verdict of a candidate whose check exceeded its budget and was not refuted by the bounded checks
+UNVERIFIED = "unverified"
+# bound of the bounded checks used after a check exceeded its budget (if --bounded_check is not given)
+FALLBACK_BOUND = 3
+# counterexamples of the initial condition with more runs to encode are not learned
+MAX_LEARNED_RUNS = 4096
+
+def check_bounded_fallback(A_aut, T_aut, conditions: dict) -> tuple:
+    # cheaper explicit-state checks of a candidate whose check exceeded its budget,
+    # returns (name of the failed bounded check, counterexample) or (UNVERIFIED, None)
+    # (the falsifier is built by find_solution when the checks have a budget)
+    try:
+        with budget.stage("check"):
+            for name, check in BOUNDED_CHECKS.items():
+                holds, counterexample = check(A_aut, T_aut, conditions)
+                if not holds:
+                    return (name, counterexample)
+    except budget.BudgetExceeded as e:
+        if e.stage != "check":
+            raise
+        print(e)
+    return (UNVERIFIED, None)
+
+# checks that are more expensive than the canonical forms of a candidate
+# -> the candidate cache is used only before the first of them
+CACHED_CHECKS = ["backwards_reachability", "transition"]
+
+class CandidateCache:
+    # verdicts of the checks for candidates with the same languages of A and T
+    def __init__(self):
+        self.verdicts = dict()
+        self.lookups = 0
+        self.hits = 0
+        # time of the canonical forms and lookups
+        self.time = 0.0
+
+    def get_key(self, A_aut: automata.Automaton, T_aut: automata.Automaton) -> str:
+        canonical_form = (automata.get_canonical_form(A_aut), automata.get_canonical_form(T_aut))
+        return hashlib.sha1(repr(canonical_form).encode()).hexdigest()
+
+    def lookup(self, key: str):
+        self.lookups += 1
+        if key in self.verdicts:
+            self.hits += 1
+            return self.verdicts[key]
+        return None
+
+    def store(self, key: str, failed_check: str, counterexample):
+        self.verdicts[key] = (failed_check, counterexample)
+
+def check_candidate(
+        A_aut: automata.Automaton,
+        T_aut: automata.Automaton,
+        conditions: dict,
+        order = None,
+        cache = None
+    ) -> tuple:
+    # returns (None, None, timings) if all conditions hold for the candidate,
+    # otherwise the name of the failed check, its counterexample and timings
+    # of the checks that were run (name, duration, rejected)
+    if order == None:
+        order = list(CANDIDATE_CHECKS.keys())
+
+    timings = list()
+    failed_check, counterexample = None, None
+    key = None
+    for name in order:
+        # safe point between the checks
+        budget.check()
+        if cache != None and key == None and name in CACHED_CHECKS:
+            # the same languages were already checked -> reuse the verdict
+            # (candidates rejected by cheaper checks never compute their canonical forms)
+            start = time.perf_counter()
+            key = cache.get_key(A_aut, T_aut)
+            verdict = cache.lookup(key)
+            cache.time += time.perf_counter() - start
+            if verdict != None:
+                failed_check, counterexample = verdict
+                return (failed_check, counterexample, timings)
+        start = time.perf_counter()
+        check = CANDIDATE_CHECKS[name] if name in CANDIDATE_CHECKS else BOUNDED_CHECKS[name]
+        try:
+            with tracing.operation_span("check " + name, [A_aut, T_aut]) as span, budget.stage("check"):
+                holds, counterexample = check(A_aut, T_aut, conditions)
+                span.set_attribute("rejected", not holds)
+        except budget.BudgetExceeded as e:
+            if e.stage != "check":
+                # budget of the whole search
+                raise
+            # the construction is reported, the candidate is refuted by the bounded checks if possible
+            print(e)
+            timings.append((name, time.perf_counter() - start, False))
+            failed_check, counterexample = check_bounded_fallback(A_aut, T_aut, conditions)
+            break
+        timings.append((name, time.perf_counter() - start, not holds))
+        if not holds:
+            failed_check = name
+            break
+
+    if key != None and failed_check != UNVERIFIED:
+        cache.store(key, failed_check, counterexample if failed_check != None else None)
+    if failed_check == None:
+        return (None, None, timings)
+    return (failed_check, counterexample, timings)
+
+def get_counterexample_length(counterexample):
+    # length of the word(s) of the counterexample (None if there is no word)
+    if counterexample == None:
+        return None
+    if isinstance(counterexample, tuple):
+        return len(counterexample[0])
+    return len(counterexample)
+
+def record_counterexample(scheduler: CheckScheduler, failed_check: str, counterexample):
+    length = get_counterexample_length(counterexample)
+    if length != None:
+        scheduler.record_value("counterexample_length." + failed_check, length)
+
+class CandidateRejected(SystemExit):
+    # given invariant or relation does not satisfy a condition
+    # (SystemExit -> check.py ends after the printed reason, the batch mode records the failed condition)
+    def __init__(self, failed_check: str, reason: str):
+        super().__init__()
+        self.failed_check = failed_check
+        self.reason = reason
+
+def reject_given_candidate(failed_check: str, reason: str):
+    print(reason)
+    raise CandidateRejected(failed_check, reason)
+
+def learn_from_failed_check(
+        failed_check: str,
+        counterexample,
+        solver: Solver,
+        A: Invariant,
+        T: Invariant,
+        restricted_initial_conf: automata.Automaton,
+        invariant_given: bool,
+        relation_given: bool
+    ):
+    # add clauses learned from the counterexample to the solver
+    if failed_check == UNVERIFIED:
+        # nothing is known about the candidate (it is only blocked)
+        return
+    failed_check = LEARNED_AS.get(failed_check, failed_check)
+    if failed_check == "initial":
+        if invariant_given:
+            reject_given_candidate(failed_check, "Given invariant does not contain initial configurations")
+        word = counterexample
+        # this PROJECTED word should be accepted
+        total_symbols = sum([len(map) for map in restricted_initial_conf.symbol_map.copy()])
+        conf_variables = total_symbols - len(word[0]) if len(word) > 0 else 0
+        if 2 ** (conf_variables * len(word)) * A.num_states ** len(word) > MAX_LEARNED_RUNS:
+            # in order to prevent explosion of variables 
+            # (all extensions of the word times all runs, the candidate is only blocked)
+            return  
+        words = get_all_words_from_projected_word(word, conf_variables)
+        add_words_to_be_accepted(words, solver, A)
+
+    elif failed_check == "irreflexivity":
+        # this word should be rejected 
+        if not relation_given:
+            add_word_to_be_rejected(counterexample, solver, T)
+        else:
+            reject_given_candidate(failed_check, "Given relation is not irreflexive")
+
+    elif failed_check == "transitivity" and not invariant_given and not relation_given:
+        add_transitivity_constraint(counterexample, solver, A, T)
+
+    elif relation_given and invariant_given:
+        messages = {
+            "transitivity": "Given relation is not transitive",
+            "backwards_reachability": "Backwards reachability does not hold",
+            "transition": "Transition condition does not hold"
+        }
+        reject_given_candidate(failed_check, messages[failed_check])
+
+def record_cache_statistics(scheduler: CheckScheduler, cache, memo = None, context = None):
+    if context != None:
+        # sizes of the quantifier blocks in the transition condition
+        scheduler.record_sizes({"quantifiers " + name: sizes for name, sizes in context.block_sizes.items()})
+    if memo != None:
+        scheduler.record_count("invariant_memo_lookups", memo.lookups)
+        scheduler.record_count("invariant_memo_hits", memo.hits)
+    if cache == None:
+        return
+    scheduler.record_count("candidate_cache_lookups", cache.lookups)
+    scheduler.record_count("candidate_cache_hits", cache.hits)
+    if cache.lookups > 0:
+        scheduler.record_phase("candidate_cache_lookup", cache.time, cache.lookups)
+    print(
+        "Candidate cache:", cache.hits, "hits in", cache.lookups, "lookups", 
+        "({:.1f}%)".format(100 * cache.hits / cache.lookups if cache.lookups > 0 else 0),
+        "in {:.3f} s".format(cache.time)
+    )
+
+def solve(solver: Solver) -> bool:
+    with tracing.operation_span("sat_solve"):
+        return solver.solve()
+
+def record_solver_statistics(scheduler: CheckScheduler, solver: Solver, iterations: int):
+    # size of the encoding and effort of the SAT solver (before the solver is deleted)
+    scheduler.record_count("sat_iterations", iterations)
+    scheduler.record_count("sat_variables", max(solver.nof_vars(), 0))
+    for name, value in solver.accum_stats().items():
+        scheduler.record_count("sat_" + name, value)
+
+def report_unverified_candidates(scheduler: CheckScheduler, result: tuple):
+    # the search is not complete if some candidates were only blocked
+    unverified = scheduler.counters.get("unverified_candidates", 0)
+    if result == (None, None) and unverified > 0:
+        print(unverified, "candidates exceeded the budget of the checks and were skipped without being verified")
+
+def report_check_statistics(scheduler: CheckScheduler, check_stats):
+    # "-" prints the statistics, otherwise they are saved as JSON
+    if check_stats == None:
+        return
+    if check_stats == "-":
+        print(scheduler.report())
+    else:
+        scheduler.dump(check_stats)
+
+# state of the pipeline worker processes (inherited with fork)
+PIPELINE_STATE = dict()
+# seconds between two checks of the workers while waiting for a result
+PIPELINE_POLL_INTERVAL = 1
+
+def init_pipeline_worker(state: dict, started_workers):
+    # a handler of SIGTERM inherited from the main process would keep the worker
+    # alive after pool.terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # workers that die are replaced by the pool -> more started workers than processes
+    with started_workers.get_lock():
+        started_workers.value += 1
+    PIPELINE_STATE.update(state)
+
+def check_model_in_worker(model: list, order: list) -> tuple:
+    # decode the candidate from the model and run all checks
+    state = PIPELINE_STATE
+    tracing.next_iteration()
+    start = time.perf_counter()
+    with tracing.operation_span("decode_model") as span:
+        A_aut, T_aut = decode_model(model, state["A"], state["T"], state["A_aut"], state["T_aut"], state["conditions"])
+        span.set_outputs([A_aut, T_aut])
+    decoding_time = time.perf_counter() - start
+    failed_check, counterexample, timings = check_candidate(A_aut, T_aut, state["conditions"], order, state["cache"])
+    return model, failed_check, counterexample, timings, decoding_time, take_worker_statistics(state)
+
+def take_worker_statistics(state: dict) -> dict:
+    # counters of the caches of the worker since its previous candidate
+    # (the counters of the worker are reset, the main process adds them up)
+    memo = state["conditions"]["invariant_memo"]
+    context = state["conditions"]["verification_context"]
+    cache = state["cache"]
+    statistics = dict(
+        memo = (memo.lookups, memo.hits),
+        cache = (cache.lookups, cache.hits, cache.time) if cache != None else (0, 0, 0.0),
+        block_sizes = context.block_sizes
+    )
+    memo.lookups, memo.hits = 0, 0
+    if cache != None:
+        cache.lookups, cache.hits, cache.time = 0, 0, 0.0
+    context.block_sizes = dict()
+    return statistics
+
+def add_worker_statistics(statistics: dict, cache, memo, context):
+    memo.lookups += statistics["memo"][0]
+    memo.hits += statistics["memo"][1]
+    if cache != None:
+        cache.lookups += statistics["cache"][0]
+        cache.hits += statistics["cache"][1]
+        cache.time += statistics["cache"][2]
+    for name, (calls, max_states, total_states) in statistics["block_sizes"].items():
+        sizes = context.block_sizes.setdefault(name, [0, 0, 0])
+        sizes[0] += calls
+        sizes[1] = max(sizes[1], max_states)
+        sizes[2] += total_states
+
+def find_solution_pipelined(
+        solver: Solver,
+        A: Invariant,
+        T: Invariant,
+        A_aut,
+        T_aut,
+        conditions: dict,
+        scheduler: CheckScheduler,
+        use_cache: bool,
+        workers: int,
+        queue_size: int,
+        show_progress = True
+    ):
+    invariant_given = (A_aut != None)
+    relation_given = (T_aut != None)
+
+    # results of the checks are collected by the pool callbacks
+    results = queue.Queue()
+    context = multiprocessing.get_context("fork")
+    started_workers = context.Value("i", 0)
+    pool = context.Pool(
+        processes = workers,
+        initializer = init_pipeline_worker,
+        # every worker has its own candidate cache
+        initargs = (dict(
+            A=A, 
+            T=T, 
+            A_aut=A_aut, 
+            T_aut=T_aut, 
+            conditions=conditions, 
+            cache=CandidateCache() if use_cache else None
+        ), started_workers)
+    )
+    # counters of the caches of all workers
+    cache = CandidateCache() if use_cache else None
+
+    try:
+        iterations = 0
+        pending = 0
+        exhausted = False
+        while True:
+            # safe point -> an exceeded budget of the search is raised here
+            budget.check()
+            # the solver keeps producing candidates until the queue is full
+            while not exhausted and pending < queue_size:
+                if not solve(solver):
+                    exhausted = True
+                    break
+                model = solver.get_model()
+                # block the candidate
+                blocking_clause = A.pool.get_blocking_clause(model)
+                if len(blocking_clause) == 0:
+                    exhausted = True
+                else:
+                    solver.add_clause(blocking_clause)
+                iterations += 1
+                tracing.next_iteration()
+                if show_progress:
+                    print("Iteration", iterations, end="\r", flush=True)
+                pool.apply_async(
+                    check_model_in_worker, 
+                    (model, scheduler.order()), 
+                    callback = results.put,
+                    error_callback = results.put
+                )
+                pending += 1
+
+            if pending == 0:
+                # no advice bits were found for k_max
+                return None, None
+
+            # wait for at least one checked candidate
+            # (the candidate of a worker that died is lost -> the search is stopped)
+            result = None
+            while result == None:
+                try:
+                    result = results.get(timeout = PIPELINE_POLL_INTERVAL)
+                except queue.Empty:
+                    budget.check()
+                    if started_workers.value > workers:
+                        raise RuntimeError("A worker of the pipeline exited unexpectedly")
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            model, failed_check, counterexample, timings, decoding_time, statistics = result
+            scheduler.record_phase("convert_model_to_automaton", decoding_time)
+            add_worker_statistics(
+                statistics, 
+                cache, 
+                conditions["invariant_memo"], 
+                conditions["verification_context"]
+            )
+            for timing in timings:
+                scheduler.record(*timing)
+            if failed_check == UNVERIFIED:
+                scheduler.record_count("unverified_candidates")
+            if failed_check == None:
+                # first fully validated candidate wins
+                return decode_model(
+                    model, 
+                    A, 
+                    T, 
+                    A_aut if invariant_given else None, 
+                    T_aut if relation_given else None, 
+                    conditions
+                )
+            record_counterexample(scheduler, failed_check, counterexample)
+            # learned clauses are fed back while other candidates are checked
+            with tracing.operation_span("learn " + failed_check):
+                learn_from_failed_check(
+                    failed_check = failed_check,
+                    counterexample = counterexample,
+                    solver = solver,
+                    A = A,
+                    T = T,
+                    restricted_initial_conf = conditions["restricted_initial_conf"],
+                    invariant_given = invariant_given,
+                    relation_given = relation_given
+                )
+    finally:
+        pool.terminate()
+        pool.join()
+        record_solver_statistics(scheduler, solver, iterations)
+        record_cache_statistics(scheduler, cache, conditions["invariant_memo"], conditions["verification_context"])
+        solver.delete()
+
+def run_portfolio_member(solver_name: str, arguments: dict, results):
+    # runs in a separate process, the first result in the queue wins
+    try:
+        A_aut, T_aut = find_solution(
+            **arguments, 
+            solver_name = solver_name, 
+            show_progress = False
+        )
+        results.put((solver_name, (A_aut, T_aut), None))
+    except SystemExit as e:
+        # given invariant or relation does not satisfy the conditions
+        results.put((solver_name, None, e.code))
+
+def find_solution_portfolio(solver_names: list, **arguments):
+    # run the same CEGIS loop with different SAT solvers in parallel
+    # fork -> automata do not have to be passed to child processes
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = list()
+    for solver_name in solver_names:
+        process = context.Process(
+            target = run_portfolio_member, 
+            args = (solver_name, arguments, results),
+            daemon = True
+        )
+        process.start()
+        processes.append(process)
+
+    # wait for the first result
+    winner = None
+    while winner == None:
+        try:
+            winner = results.get(timeout=1)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes) and results.empty():
+                # all solvers crashed
+                raise RuntimeError("All solvers in the portfolio failed")
+
+    # stop the remaining solvers
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+
+    solver_name, solution, exit_code = winner
+    if solution == None:
+        # the winning process has already printed the reason
+        sys.exit(exit_code)
+
+    A_aut, T_aut = solution
+    return A_aut, T_aut, solver_name
+
+def get_model_view(model: list, pool: VariablePool) -> numpy.ndarray:
+    # boolean view of the model indexed by variable
+    literals = numpy.asarray(model, dtype=numpy.int64)
+    view = numpy.zeros(max(pool.top, len(literals)) + 1, dtype=bool)
+    view[literals[literals > 0]] = True
+    return view
+
+def decode_model(
+        model: list,
+        A: Invariant,
+        T: Invariant,
+        A_aut,
+        T_aut,
+        conditions: dict
+    ) -> tuple:
+    # given automata are kept, the other ones are decoded from the model
+    model_view = get_model_view(model, A.pool)
+    memo = conditions.get("invariant_memo")
+    if A_aut == None:
+        # the same invariant as in the previous model -> reuse it with its artefacts
+        key = get_invariant_key(model_view, A)
+        if memo != None:
+            A_aut = memo.lookup(key)
+        if A_aut == None:
+            A_aut = convert_model_to_automaton(
+                model = model_view, 
+                inv = A, 
+                symbol_map = conditions["restricted_initial_conf"].symbol_map.copy()
+            )
+            if memo != None:
+                memo.store(key, A_aut)
+    elif memo != None and memo.invariant is not A_aut:
+        # given invariant
+        memo.store("given", A_aut)
+    if T_aut == None:
+        T_aut = convert_model_to_automaton(
+            model = model_view,
+            inv = T, 
+            symbol_map = conditions["restricted_transducer"].symbol_map.copy()
+        )
+    return A_aut, T_aut
+
+def get_invariant_key(model_view: numpy.ndarray, inv: Invariant) -> bytes:
+    # values of the state and transition variables of the invariant
+    parts = list()
+    for family in [inv.states_family(), inv.transitions_family()]:
+        first, shape = inv.pool.families[family]
+        parts.append(numpy.packbits(model_view[first:first+int(numpy.prod(shape))]).tobytes())
+    return b"|".join(parts)
 
 def convert_model_to_automaton(
-        model: list, 
+        model, 
         inv: Invariant,
         symbol_map: list
     ) -> automata.Automaton:
-    # alphabet
-    alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(automata.create_symbol_map(len(inv.used_alphabet[0])))
+    if not isinstance(model, numpy.ndarray):
+        model = get_model_view(model, inv.pool)
+
+    # alphabet (shared by all candidates)
+    if inv.alphabet == None:
+        inv.alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(automata.create_symbol_map(len(inv.used_alphabet[0])))
+        inv.symbol_codes = [
+            [inv.alphabet.translate_symbol(symbol) for symbol in symbol_class] 
+            for symbol_class in inv.symbol_classes
+        ]
+    alphabet = inv.alphabet
     mata_nfa.store()["alphabet"] = alphabet
     
     # create automaton
@@ -384,20 +1405,16 @@ def convert_model_to_automaton(
     # states labeled from 0 -> variable-1
     new_aut.make_initial_state(0)
     # accepting states
-    for state in inv.state_variables:
-        if state in model:
-            # TODO correct 
-            new_aut.make_final_state(state-len(inv.trans_variables)-inv.trans_variables[0])
-
-    # transitions
-    for src_index in range(inv.num_states):
-        for symbol_index in range(len(inv.used_alphabet)):
-            for dst_index in range(inv.num_states):
-                # TODO var_index for transducer!!!
-                var_index = src_index * len(inv.used_alphabet) * inv.num_states + symbol_index * inv.num_states + dst_index + inv.trans_variables[0]
-                symbol = inv.used_alphabet[symbol_index]
-                if var_index in model:
-                    new_aut.add_transition(src_index, symbol, dst_index)
+    first, shape = inv.pool.families[inv.states_family()]
+    new_aut.make_final_states(numpy.flatnonzero(model[first:first+inv.num_states]).tolist())
+
+    # transitions (only the true transition variables)
+    # every class of symbols is expanded back to its symbols
+    first, shape = inv.pool.families[inv.transitions_family()]
+    trans_view = model[first:first+len(inv.trans_variables)].reshape(shape)
+    for src_index, symbol_index, dst_index in numpy.argwhere(trans_view).tolist():
+        for symbol_code in inv.symbol_codes[symbol_index]:
+            new_aut.add_transition_object(mata_nfa.Transition(src_index, symbol_code, dst_index))
     new_aut.label = "Symbols: " + str(symbol_map.copy())
     
     result = automata.Automaton(
@@ -417,4 +1434,32 @@ if __name__ == "__main__":
     solver.add_clause([1, 3])
     solver.add_clause([-2, 3])
     for model in solver.enum_models():
-        print(model)
\ No newline at end of file
+        print(model)
+    # learning from a counterexample of the initial condition
+    # (the projected word 0 1 has to be accepted with some bits of the configuration)
+    pool = VariablePool()
+    A = Invariant(2, pool, "A")
+    A.set_alphabet(["00", "01", "10", "11"])
+    solver = Solver(name='g3')
+    generate_condition_for_automaton(A, solver)
+    generate_condition_for_accepting_states(A, solver)
+    clauses = solver.nof_clauses()
+    learn_from_failed_check(
+        failed_check = "initial",
+        counterexample = ["0", "1"],
+        solver = solver,
+        A = A,
+        T = None,
+        restricted_initial_conf = automata.Automaton(None, None, [["p"], ["q"]], 1, ["p"]),
+        invariant_given = False,
+        relation_given = False
+    )
+    print("Learned clauses:", solver.nof_clauses() - clauses)
+    assert solver.nof_clauses() > clauses
+    words = get_all_words_from_projected_word(["0", "1"], 1)
+    for model in itertools.islice(solver.enum_models(), 100):
+        assert any(
+            all(model[var - 1] > 0 for var in path) 
+            for word in words 
+            for path in get_accepting_paths(word, A)
+        )
@@ -0,0 +1,138 @@
+import json
+
+class CheckStatistics:
+    def __init__(self, name: str):
+        self.name = name
+        self.runs = 0
+        self.rejections = 0
+        self.total_time = 0.0
+
+    def mean_time(self) -> float:
+        if self.runs == 0:
+            return 0.0
+        return self.total_time / self.runs
+
+    def rejection_rate(self) -> float:
+        # Laplace smoothing -> checks that were not run yet are not starved
+        return (self.rejections + 1) / (self.runs + 2)
+
+    def cost_per_rejection(self) -> float:
+        return self.mean_time() / self.rejection_rate()
+
+    def to_dict(self) -> dict:
+        return {
+            "check": self.name,
+            "runs": self.runs,
+            "rejections": self.rejections,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time(),
+            "rejection_rate": self.rejections / self.runs if self.runs > 0 else 0.0,
+            "cost_per_rejection": self.cost_per_rejection()
+        }
+
+class CheckScheduler:
+    def __init__(self, check_names: list, warmup = 3, adaptive = True):
+        # checks run less than warmup times are tried first (in the default order)
+        self.check_names = check_names.copy()
+        self.warmup = warmup
+        # the adaptive order depends on measured times -> runs are not reproducible,
+        # otherwise the checks always run in the default order
+        self.adaptive = adaptive
+        self.statistics = {name: CheckStatistics(name) for name in check_names}
+        # other timed phases of the loop (name -> [calls, total time])
+        self.phases = dict()
+        # other counters of the loop (e.g. cache hits)
+        self.counters = dict()
+        # sizes of constructions (name -> [calls, max states, total states])
+        self.sizes = dict()
+        # histograms of values (e.g. lengths of counterexamples, name -> value -> count)
+        self.histograms = dict()
+
+    def record(self, name: str, duration: float, rejected: bool):
+        stats = self.statistics[name]
+        stats.runs += 1
+        stats.total_time += duration
+        if rejected:
+            stats.rejections += 1
+
+    def record_phase(self, name: str, duration: float, calls = 1):
+        if name not in self.phases:
+            self.phases[name] = [0, 0.0]
+        self.phases[name][0] += calls
+        self.phases[name][1] += duration
+
+    def record_count(self, name: str, value = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_sizes(self, sizes: dict):
+        for name, (calls, max_states, total_states) in sizes.items():
+            if name not in self.sizes:
+                self.sizes[name] = [0, 0, 0]
+            self.sizes[name][0] += calls
+            self.sizes[name][1] = max(self.sizes[name][1], max_states)
+            self.sizes[name][2] += total_states
+
+    def record_value(self, name: str, value: int):
+        histogram = self.histograms.setdefault(name, dict())
+        histogram[value] = histogram.get(value, 0) + 1
+
+    def order(self) -> list:
+        if not self.adaptive:
+            return self.check_names.copy()
+        # cheapest expected cost per rejected candidate first
+        def expected_cost(name):
+            stats = self.statistics[name]
+            if stats.runs < self.warmup:
+                return 0.0
+            return stats.cost_per_rejection()
+        return sorted(self.check_names, key=expected_cost)
+
+    def report(self) -> str:
+        lines = ["{:<25}{:>8}{:>12}{:>14}{:>16}".format("check", "runs", "rejected", "mean time", "cost/reject")]
+        for name in self.order():
+            stats = self.statistics[name]
+            lines.append("{:<25}{:>8}{:>12}{:>14.4f}{:>16.4f}".format(
+                name,
+                stats.runs,
+                stats.rejections,
+                stats.mean_time(),
+                stats.cost_per_rejection()
+            ))
+        for name, (calls, total_time) in self.phases.items():
+            lines.append("{:<25}{:>8}{:>12}{:>14.4f}".format(
+                name,
+                calls,
+                "-",
+                total_time / calls
+            ))
+        for name, value in self.counters.items():
+            lines.append("{:<25}{:>8}".format(name, value))
+        if len(self.sizes) > 0:
+            lines.append("{:<25}{:>8}{:>12}{:>14}".format("construction", "calls", "max states", "mean states"))
+            for name, (calls, max_states, total_states) in self.sizes.items():
+                lines.append("{:<25}{:>8}{:>12}{:>14.1f}".format(name, calls, max_states, total_states / calls))
+        for name, histogram in self.histograms.items():
+            lines.append(name + ": " + " ".join(
+                "{}:{}".format(value, histogram[value]) for value in sorted(histogram.keys())
+            ))
+        return "\n".join(lines)
+
+    def dump(self, file_name: str):
+        with open(file_name, "w") as f:
+            json.dump({
+                "order": self.order(),
+                "checks": [self.statistics[name].to_dict() for name in self.check_names],
+                "phases": [
+                    {"phase": name, "calls": calls, "total_time": total_time, "mean_time": total_time / calls}
+                    for name, (calls, total_time) in self.phases.items()
+                ],
+                "counters": self.counters,
+                "sizes": [
+                    {"construction": name, "calls": calls, "max_states": max_states, "mean_states": total_states / calls}
+                    for name, (calls, max_states, total_states) in self.sizes.items()
+                ],
+                "histograms": {
+                    name: {str(value): histogram[value] for value in sorted(histogram.keys())}
+                    for name, histogram in self.histograms.items()
+                }
+            }, f, indent=4)
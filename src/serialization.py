@@ -0,0 +1,124 @@
+import automata
+import libmata.nfa.nfa as mata_nfa
+from libmata import alphabets
+import json
+import numpy
+
+# binary format of automata.Automaton:
+#   magic (8 bytes) | header length (uint32) | JSON header (padded to 4 bytes)
+#   | transitions (uint32 src, symbol, dst) | initial states (bitset) | final states (bitset)
+# the body is read through numpy.memmap -> no parsing, arrays are views of the file
+
+MAGIC = b"PHAUT\x00\x01\x00"
+HEADER_LENGTH = numpy.dtype("<u4")
+TRANSITION = numpy.dtype("<u4")
+
+def get_symbol_width(aut: automata.Automaton) -> int:
+    symbols = aut.alphabet.get_symbol_map().keys()
+    return len(next(iter(symbols))) if len(symbols) > 0 else 0
+
+def to_json_value(value):
+    # symbol maps can contain tuples and sets of atomic propositions
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_json_value(item) for item in value)
+    return value
+
+def get_bitset(states, number_of_states: int) -> numpy.ndarray:
+    bits = numpy.zeros(number_of_states, dtype=numpy.uint8)
+    bits[list(states)] = 1
+    return numpy.packbits(bits, bitorder="little")
+
+def get_header(aut: automata.Automaton) -> dict:
+    width = get_symbol_width(aut)
+    if width > 32:
+        raise ValueError("Symbols of width " + str(width) + " do not fit into the binary format")
+    return {
+        "class": type(aut).__name__,
+        "symbol_map": to_json_value(aut.symbol_map),
+        "number_of_tapes": aut.number_of_tapes,
+        "atomic_propositions": to_json_value(aut.atomic_propositions),
+        "width": width,
+        "states": aut.automaton.num_of_states(),
+        "transitions": aut.automaton.get_num_of_transitions(),
+        "label": aut.automaton.label
+    }
+
+def to_bytes(aut: automata.Automaton) -> bytes:
+    header = get_header(aut)
+    encoded_header = json.dumps(header, sort_keys=True).encode()
+    # body is aligned to 4 bytes
+    encoded_header += b" " * (-(len(MAGIC) + HEADER_LENGTH.itemsize + len(encoded_header)) % 4)
+
+    transitions = numpy.array(
+        [(t.source, t.symbol, t.target) for t in aut.automaton.iterate()],
+        dtype=TRANSITION
+    ).reshape(-1, 3)
+    return b"".join([
+        MAGIC,
+        numpy.array([len(encoded_header)], dtype=HEADER_LENGTH).tobytes(),
+        encoded_header,
+        transitions.tobytes(),
+        get_bitset(aut.automaton.initial_states, header["states"]).tobytes(),
+        get_bitset(aut.automaton.final_states, header["states"]).tobytes()
+    ])
+
+def save_automaton(aut: automata.Automaton, file_name: str):
+    with open(file_name, "wb") as f:
+        f.write(to_bytes(aut))
+
+def read_arrays(buffer) -> tuple:
+    # header, transitions (n x 3), initial and final states as boolean arrays
+    # (arrays share the memory of the buffer)
+    data = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    if len(data) < len(MAGIC) + HEADER_LENGTH.itemsize or data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError("Not an automaton in the binary format")
+    offset = len(MAGIC)
+    header_length = int(data[offset:offset + HEADER_LENGTH.itemsize].view(HEADER_LENGTH)[0])
+    offset += HEADER_LENGTH.itemsize
+    header = json.loads(data[offset:offset + header_length].tobytes())
+    offset += header_length
+
+    transitions_size = header["transitions"] * 3 * TRANSITION.itemsize
+    bitset_size = (header["states"] + 7) // 8
+    if len(data) != offset + transitions_size + 2 * bitset_size:
+        raise ValueError("Truncated automaton in the binary format")
+    transitions = data[offset:offset + transitions_size].view(TRANSITION).reshape(-1, 3)
+    offset += transitions_size
+    initial = numpy.unpackbits(data[offset:offset + bitset_size], count=header["states"], bitorder="little")
+    offset += bitset_size
+    final = numpy.unpackbits(data[offset:offset + bitset_size], count=header["states"], bitorder="little")
+    return (header, transitions, initial.astype(bool), final.astype(bool))
+
+def open_arrays(file_name: str) -> tuple:
+    return read_arrays(numpy.memmap(file_name, dtype=numpy.uint8, mode="r"))
+
+def from_arrays(header: dict, transitions: numpy.ndarray, initial: numpy.ndarray, final: numpy.ndarray) -> automata.Automaton:
+    alphabet = alphabets.OnTheFlyAlphabet.from_symbol_map(automata.create_symbol_map(header["width"]))
+    mata_nfa.store()["alphabet"] = alphabet
+    automaton = mata_nfa.Nfa(header["states"])
+    automaton.make_initial_states(numpy.flatnonzero(initial).tolist())
+    automaton.make_final_states(numpy.flatnonzero(final).tolist())
+    add_transition = automaton.add_transition
+    for src, symbol, dst in transitions.tolist():
+        add_transition(src, symbol, dst)
+    automaton.label = header["label"]
+
+    if header["class"] == "Transducer":
+        constructor = automata.Transducer
+    else:
+        constructor = automata.Automaton
+    return constructor(
+        automaton,
+        alphabet,
+        header["symbol_map"],
+        header["number_of_tapes"],
+        header["atomic_propositions"]
+    )
+
+def from_bytes(buffer) -> automata.Automaton:
+    return from_arrays(*read_arrays(buffer))
+
+def load_automaton(file_name: str) -> automata.Automaton:
+    return from_arrays(*open_arrays(file_name))
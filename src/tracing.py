@@ -0,0 +1,262 @@
+import json
+import os
+import time
+
+# nested spans of the verification (stages, SAT calls, checks of candidates),
+# every finished span is written as one JSON line:
+#   {"id", "parent", "pid", "name", "start", "wall", "cpu", "inputs", "outputs", "attributes"}
+# inputs and outputs are sizes of automata (states, transitions, alphabet width)
+# tracing is disabled by default -> span() returns a shared span that does nothing
+# spans of the operations of every iteration of the CEGIS loop (operation_span()) are not
+# written one by one: their calls, times and sums of numeric attributes are added up and written
+# as children of one "iterations" span every ITERATIONS_PER_SPAN iterations or FLUSH_INTERVAL seconds
+
+TRACER = None
+ITERATIONS_PER_SPAN = 1000
+FLUSH_INTERVAL = 1.0
+
+def get_size(aut) -> dict:
+    # sizes of automata.Automaton (None for missing automata)
+    if aut == None:
+        return None
+    symbols = aut.alphabet.get_symbol_map().keys()
+    return {
+        "states": aut.automaton.num_of_states(),
+        "transitions": aut.automaton.get_num_of_transitions(),
+        "width": len(next(iter(symbols))) if len(symbols) > 0 else 0
+    }
+
+class Span:
+    def __init__(self, tracer, name: str, inputs: list, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.inputs = inputs
+        self.outputs = list()
+        self.attributes = attributes
+
+    def set_outputs(self, outputs: list):
+        self.outputs = outputs
+
+    def set_attribute(self, name: str, value):
+        self.attributes[name] = value
+
+    def __enter__(self):
+        self.id = self.tracer.new_id()
+        self.parent = self.tracer.stack[-1].id if len(self.tracer.stack) > 0 else None
+        self.tracer.stack.append(self)
+        self.start = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        self.tracer.stack.pop()
+        if exception_type != None:
+            self.attributes["exception"] = exception_type.__name__
+        self.tracer.write({
+            "id": self.id,
+            "parent": self.parent,
+            "pid": os.getpid(),
+            "name": self.name,
+            "start": self.start,
+            "wall": wall,
+            "cpu": cpu,
+            "inputs": [get_size(aut) for aut in self.inputs],
+            "outputs": [get_size(aut) for aut in self.outputs],
+            "attributes": self.attributes
+        })
+        return False
+
+class OperationSpan:
+    # span whose times and attributes are added to the totals of its operation
+    def __init__(self, tracer, name: str, inputs: list, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.inputs = inputs
+        self.outputs = list()
+        self.attributes = attributes
+
+    def set_outputs(self, outputs: list):
+        self.outputs = outputs
+
+    def set_attribute(self, name: str, value):
+        self.attributes[name] = value
+
+    def __enter__(self):
+        self.tracer.operations.append(self.name)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        # nested operations are kept apart (path of the operations)
+        path = tuple(self.tracer.operations)
+        self.tracer.operations.pop()
+        if exception_type != None:
+            self.attributes["exception"] = 1
+        self.tracer.add_operation(path, wall, cpu, self.inputs, self.outputs, self.attributes)
+        return False
+
+class NullSpan:
+    # span of the disabled tracer
+    def set_outputs(self, outputs: list):
+        pass
+
+    def set_attribute(self, name: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Tracer:
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        # appends of single lines -> forked workers can share the file
+        open(file_name, "w").close()
+        self.file = open(file_name, "a", buffering=1)
+        self.stack = list()
+        self.counter = 0
+        # names of the running operations
+        self.operations = list()
+        # totals of the operations since the last flush (path -> record)
+        self.totals = dict()
+        self.iterations = 0
+        self.batch_parent = None
+        self.batch_start = None
+
+    def new_id(self) -> str:
+        # forked workers continue with the same counter -> ids contain the pid
+        self.counter += 1
+        return str(os.getpid()) + ":" + str(self.counter)
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record) + "\n")
+
+    def add_operation(self, path: tuple, wall: float, cpu: float, inputs: list, outputs: list, attributes: dict):
+        if self.batch_start == None:
+            # the first operation of the batch -> parent and start of the "iterations" span
+            self.batch_parent = self.stack[-1].id if len(self.stack) > 0 else None
+            self.batch_start = (time.time() - wall, time.perf_counter() - wall, time.process_time() - cpu)
+        if path not in self.totals:
+            self.totals[path] = {"calls": 0, "wall": 0.0, "cpu": 0.0, "max_input_states": 0, "max_output_states": 0}
+        totals = self.totals[path]
+        totals["calls"] += 1
+        totals["wall"] += wall
+        totals["cpu"] += cpu
+        totals["max_input_states"] = max([totals["max_input_states"]] + [aut.automaton.num_of_states() for aut in inputs if aut != None])
+        totals["max_output_states"] = max([totals["max_output_states"]] + [aut.automaton.num_of_states() for aut in outputs if aut != None])
+        for name, value in attributes.items():
+            if isinstance(value, (bool, int, float)):
+                totals[name] = totals.get(name, 0) + value
+
+    def next_iteration(self):
+        self.iterations += 1
+        if self.batch_start != None and (
+            self.iterations >= ITERATIONS_PER_SPAN or time.perf_counter() - self.batch_start[1] >= FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        # one "iterations" span with a child for every path of operations
+        if self.batch_start == None:
+            return
+        start, start_wall, start_cpu = self.batch_start
+        ids = {(): self.new_id()}
+        self.write({
+            "id": ids[()],
+            "parent": self.batch_parent,
+            "pid": os.getpid(),
+            "name": "iterations",
+            "start": start,
+            "wall": time.perf_counter() - start_wall,
+            "cpu": time.process_time() - start_cpu,
+            "inputs": [],
+            "outputs": [],
+            "attributes": {"iterations": self.iterations}
+        })
+        for path in sorted(self.totals.keys(), key=len):
+            totals = self.totals[path]
+            ids[path] = self.new_id()
+            self.write({
+                "id": ids[path],
+                # the enclosing operation is flushed together with its nested ones
+                "parent": ids.get(path[:-1], ids[()]),
+                "pid": os.getpid(),
+                "name": path[-1],
+                "start": start,
+                "wall": totals["wall"],
+                "cpu": totals["cpu"],
+                "inputs": [],
+                "outputs": [],
+                "attributes": {name: value for name, value in totals.items() if name not in ["wall", "cpu"]}
+            })
+        self.totals = dict()
+        self.iterations = 0
+        self.batch_start = None
+
+    def close(self):
+        self.file.close()
+
+def enable(file_name: str):
+    global TRACER
+    TRACER = Tracer(file_name)
+
+def disable():
+    global TRACER
+    if TRACER != None:
+        TRACER.flush()
+        TRACER.close()
+    TRACER = None
+
+def span(name: str, inputs = None, **attributes):
+    if TRACER == None:
+        return NULL_SPAN
+    return Span(TRACER, name, inputs if inputs != None else list(), attributes)
+
+def operation_span(name: str, inputs = None, **attributes):
+    # span of an operation repeated in every iteration (only the totals are written)
+    if TRACER == None:
+        return NULL_SPAN
+    return OperationSpan(TRACER, name, inputs if inputs != None else list(), attributes)
+
+def next_iteration():
+    if TRACER != None:
+        TRACER.next_iteration()
+
+def read_spans(file_name: str) -> list:
+    with open(file_name) as f:
+        return [json.loads(line) for line in f if line.strip() != ""]
+
+def export_folded_stacks(trace_file_name: str, output_file_name: str):
+    # "root;child;grandchild <self time in microseconds>" for flame graph tools
+    # (spans of worker processes are nested in the span that started the workers)
+    spans = {record["id"]: record for record in read_spans(trace_file_name)}
+    children_time = dict()
+    for record in spans.values():
+        if record["parent"] in spans:
+            children_time[record["parent"]] = children_time.get(record["parent"], 0.0) + record["wall"]
+
+    stacks = dict()
+    for record in spans.values():
+        path = [record["name"]]
+        parent = record["parent"]
+        while parent in spans:
+            path.append(spans[parent]["name"])
+            parent = spans[parent]["parent"]
+        stack = ";".join(reversed(path))
+        # children run in parallel in workers -> self time is not negative
+        self_time = max(record["wall"] - children_time.get(record["id"], 0.0), 0.0)
+        stacks[stack] = stacks.get(stack, 0) + int(self_time * 1e6)
+
+    with open(output_file_name, "w") as f:
+        for stack in sorted(stacks.keys()):
+            f.write(stack + " " + str(stacks[stack]) + "\n")